@@ -0,0 +1,111 @@
+# backend/benchmarks/bench_authors.py
+#
+# Per-article cost of author extraction over the pages saved in
+# data/articles_cache.json.
+#
+#   python -m backend.benchmarks.bench_authors [--repeat 5]
+#
+# "legacy" reproduces the old crawler path: a fresh BeautifulSoup(html.parser)
+# tree and freshly compiled regexes per call, called twice per page (once for
+# the result and once for DEBUG_AUTH output). "component" parses each page once
+# with lxml and runs the shared AuthorExtractor on that tree.
+
+import os, json, re, time, argparse
+from bs4 import BeautifulSoup
+
+from backend.services.author_extraction import extractor, is_likely_person
+from backend.services.page_extract import parse_tree
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "data")
+CACHE_FILE = os.path.join(DATA_DIR, "articles_cache.json")
+
+
+def legacy_extract_authors(html):
+    if not html:
+        return []
+    soup = BeautifulSoup(html, "html.parser")
+    caption_keywords = re.compile(
+        r"(Ảnh|Minh họa|Hình|Nguồn|Mô phỏng|Video|Biểu đồ|Đồ họa|Trung tâm|Bệnh viện)",
+        re.IGNORECASE
+    )
+    doctor_prefix = re.compile(r"(BS\.?|BSCKI|BSCKII|BSCK|ThS\.?|TS\.?|PGS\.?|GS\.?)", re.IGNORECASE)
+
+    for tag in soup.select("p strong, p b"):
+        text = tag.get_text(" ", strip=True)
+        if not text:
+            continue
+        text = re.split(r"\s*\(", text, 1)[0].strip()
+        if caption_keywords.search(text):
+            continue
+        if is_likely_person(text):
+            return [text]
+
+    paragraphs = soup.find_all("p")
+    for p in reversed(paragraphs[-8:]):
+        text = p.get_text(" ", strip=True)
+        if not text or caption_keywords.search(text):
+            continue
+        if doctor_prefix.search(text):
+            m = re.search(
+                r'(?:BS\.?|BSCKI|BSCKII|ThS\.?|TS\.?|PGS\.?|GS\.?)\s*([A-ZĐ][a-zà-ỹ]+(?:\s+[A-ZĐ][a-zà-ỹ]+){0,4})',
+                text
+            )
+            if m and is_likely_person(m.group(1).strip()):
+                return [m.group(1).strip()]
+            break
+
+    tail_text = " ".join(
+        p.get_text(" ", strip=True)
+        for p in paragraphs[-8:]
+        if not caption_keywords.search(p.get_text(" ", strip=True))
+    )
+    m = re.search(r'([A-ZĐ][a-zà-ỹ]+(?:\s+[A-ZĐ][a-zà-ỹ]+){0,4})\s*\(Theo', tail_text)
+    if m and is_likely_person(m.group(1).strip()):
+        return [m.group(1).strip()]
+    return []
+
+
+def run_legacy(pages):
+    out = []
+    for url, html in pages:
+        out.append(legacy_extract_authors(html))
+        legacy_extract_authors(html)  # DEBUG_AUTH re-parse
+    return out
+
+
+def run_component(pages):
+    return [extractor.from_tree(parse_tree(html), url) for url, html in pages]
+
+
+def bench(fn, pages, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(pages)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    with open(CACHE_FILE, "r", encoding="utf-8") as f:
+        cached = json.load(f)
+    pages = [(a.get("url", ""), f"<html><body><p>{a.get('summary', '')}</p></body></html>")
+             for a in cached if a.get("summary")]
+    print(f"📂 {len(pages)} cached pages from {CACHE_FILE}")
+
+    legacy_t, legacy_res = bench(run_legacy, pages, args.repeat)
+    comp_t, comp_res = bench(run_component, pages, args.repeat)
+    agree = sum(a == b for a, b in zip(legacy_res, comp_res))
+
+    per = lambda t: t / max(1, len(pages)) * 1e6
+    print(f"legacy    : {per(legacy_t):8.1f} µs/article")
+    print(f"component : {per(comp_t):8.1f} µs/article  ({legacy_t / max(comp_t, 1e-9):.1f}x faster)")
+    print(f"agreement : {agree}/{len(pages)} identical author lists")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# backend/benchmarks/bench_llm_backends.py
+#
+# Claim-classification throughput per inference backend.
+#
+#   python -m backend.benchmarks.bench_llm_backends [--backends cpu-int8 onnx cuda-4bit]
+#                                                   [--sentences 64] [--batch-size 8] [--mode score]
+#
+# Each backend runs in its own subprocess (so model memory is released between
+# runs) with LLM_BACKEND set, the verdict cache and prefilter disabled, and
+# classifies the same sample of sentences from crawled_sentences.jsonl through
+# claim_extraction.classify_uncached. Reports load time, sentences/sec and how
+# often each backend agrees with the first one.
+
+import os, sys, json, time, argparse, subprocess
+
+from backend.services.stream_io import existing_path, iter_records
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "data")
+SENTENCES_FILE = os.path.join(DATA_DIR, "crawled_sentences.jsonl")
+
+
+def sample_sentences(n):
+    out = []
+    for art in iter_records(existing_path(SENTENCES_FILE, os.path.join(DATA_DIR, "crawled_sentences.json"))):
+        for s in art.get("sentences", []):
+            out.append(s)
+            if len(out) >= n:
+                return out
+    return out
+
+
+def worker(n, batch_size):
+    """Runs inside the subprocess: load the model for LLM_BACKEND and time classification."""
+    start = time.perf_counter()
+    from backend import claim_extraction as ce
+    load_time = time.perf_counter() - start
+    ce.DEBUG = False
+
+    sentences = sample_sentences(n)
+    ce.classify_uncached(sentences[:batch_size])   # warm-up (prefix cache, kernels)
+
+    start = time.perf_counter()
+    verdicts = []
+    for i in range(0, len(sentences), batch_size):
+        verdicts += ce.classify_uncached(sentences[i:i + batch_size])
+    elapsed = time.perf_counter() - start
+
+    print("RESULT " + json.dumps({
+        "backend": ce.BACKEND,
+        "load_s": round(load_time, 1),
+        "sentences": len(sentences),
+        "elapsed_s": round(elapsed, 2),
+        "verdicts": verdicts,
+    }))
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--backends", nargs="+", default=["cpu-int8", "onnx"])
+    ap.add_argument("--sentences", type=int, default=64)
+    ap.add_argument("--batch-size", type=int, default=8)
+    ap.add_argument("--mode", choices=["score", "generate"], default="score")
+    ap.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.worker:
+        worker(args.sentences, args.batch_size)
+        return
+
+    results = []
+    for backend in args.backends:
+        env = dict(os.environ, LLM_BACKEND=backend, CLAIM_MODE=args.mode,
+                   CLAIM_VERDICT_CACHE="0", CLAIM_PREFILTER="0")
+        cmd = [sys.executable, "-m", "backend.benchmarks.bench_llm_backends", "--worker",
+               "--sentences", str(args.sentences), "--batch-size", str(args.batch_size)]
+        print(f"⏳ {backend} ...")
+        proc = subprocess.run(cmd, env=env, capture_output=True, text=True)
+        lines = [l for l in proc.stdout.splitlines() if l.startswith("RESULT ")]
+        if proc.returncode != 0 or not lines:
+            err = (proc.stderr.strip().splitlines() or ["no output"])[-1]
+            print(f"❌ {backend} failed: {err}")
+            continue
+        results.append(json.loads(lines[-1][len("RESULT "):]))
+
+    if not results:
+        return
+    ref = results[0]["verdicts"]
+    print(f"\n{'backend':<10} {'load s':>7} {'sent/s':>8} {'agree vs ' + results[0]['backend']:>20}")
+    for r in results:
+        rate = r["sentences"] / max(r["elapsed_s"], 1e-9)
+        agree = sum(a == b for a, b in zip(ref, r["verdicts"]))
+        print(f"{r['backend']:<10} {r['load_s']:>7} {rate:>8.2f} {f'{agree}/{len(ref)}':>20}")
+
+
+if __name__ == "__main__":
+    main()
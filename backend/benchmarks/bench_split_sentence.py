@@ -0,0 +1,131 @@
+# backend/benchmarks/bench_split_sentence.py
+#
+# Throughput of the sentence splitter over data/crawled_articles.json.
+#
+#   python -m backend.benchmarks.bench_split_sentence [--repeat 3] [--scale 1]
+#
+# "legacy" is a verbatim copy of normalize_text / split_vietnamese_sentences
+# before the patterns were precompiled and fused; "current" is the
+# implementation in backend/split_sentence.py. Every article's output is
+# compared and any mismatch is reported, since the two must be byte-identical.
+
+import os, json, re, time, textwrap, argparse
+
+from backend.split_sentence import split_vietnamese_sentences
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "data")
+ARTICLES_FILE = os.path.join(DATA_DIR, "crawled_articles.json")
+
+
+def legacy_normalize_text(text: str):
+    if not text:
+        return ""
+    text = textwrap.dedent(text)
+    text = re.sub(r"\s*\n\s*", " ", text)
+    text = re.sub(r"\s+", " ", text).strip()
+    text = re.sub(
+        r"\b(Ảnh minh họa|Ảnh|Nguồn|Theo)\b[: ]*[^.!?]*",
+        "",
+        text,
+        flags=re.IGNORECASE
+    )
+    text = re.sub(r"\b[A-Z]{2,}\b", "", text)
+    protect = {
+        " USD.": " USD<eos>",
+        " VND.": " VND<eos>",
+        " đồng.": " đồng<eos>"
+    }
+    for k, v in protect.items():
+        text = text.replace(k, v)
+    text = re.sub(r"(\d+\/\d+)\.", r"\1<eos>", text)
+    text = re.sub(r",\s*\.", ".", text)
+    text = re.sub(r"\.\s*\.", ".", text)
+    text = re.sub(r"\(\s*\)", "", text)
+    text = re.sub(r"\(\s*[^A-Za-zÀ-ỹ0-9]+\s*\)", "", text)
+    text = re.sub(r"\(\s*[0-9\/\.]+\s*\)", "", text)
+    text = re.sub(r"\(\s*\)", "", text)
+    text = re.sub(r"\s{2,}", " ", text)
+
+    return text.strip()
+
+
+def legacy_split_vietnamese_sentences(content: str):
+    text = legacy_normalize_text(content)
+    raw = re.split(r'(?<=[.!?])\s+(?=["“A-ZÀ-Ỹ0-9])', text)
+
+    sentences = []
+    for s in raw:
+        s = s.strip()
+        if not s:
+            continue
+        s = s.replace("<eos>", ".")
+        s = re.sub(r",\s*\.", ".", s)
+        s = re.sub(r"\.\s*\.", ".", s)
+        if s in {".", "..", "..."}:
+            continue
+        sentences.append(s)
+
+    merged = []
+    buf = None
+
+    for s in sentences:
+        if buf is None:
+            buf = s
+            continue
+
+        open_quotes = (buf.count('"') % 2 == 1) or (buf.count("“") % 2 == 1)
+
+        looks_like_new = re.match(r'^["“]?[A-ZÀ-Ỹ0-9]', s) is not None
+
+        if open_quotes and not looks_like_new:
+            buf += " " + s
+        else:
+            merged.append(buf)
+            buf = s
+
+    if buf:
+        merged.append(buf)
+
+    final = []
+    for s in merged:
+        if len(s.split()) >= 9:
+            final.append(s)
+
+    return final
+
+
+def bench(fn, contents, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = [fn(c) for c in contents]
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--scale", type=int, default=1, help="repeat the corpus N times to simulate a larger one")
+    args = ap.parse_args()
+
+    with open(ARTICLES_FILE, "r", encoding="utf-8") as f:
+        articles = json.load(f)
+    contents = [a.get("content", "") for a in articles if isinstance(a, dict)] * args.scale
+    print(f"📂 {len(contents)} articles from {ARTICLES_FILE}")
+
+    legacy_t, legacy_res = bench(legacy_split_vietnamese_sentences, contents, args.repeat)
+    cur_t, cur_res = bench(split_vietnamese_sentences, contents, args.repeat)
+    mismatches = [i for i, (a, b) in enumerate(zip(legacy_res, cur_res)) if a != b]
+
+    rate = lambda t: len(contents) / max(t, 1e-9)
+    print(f"legacy  : {rate(legacy_t):10.0f} articles/s")
+    print(f"current : {rate(cur_t):10.0f} articles/s  ({legacy_t / max(cur_t, 1e-9):.1f}x faster)")
+    if mismatches:
+        print(f"❌ {len(mismatches)} articles differ, first at index {mismatches[0]}")
+    else:
+        print(f"✔ identical output on all {len(contents)} articles")
+
+
+if __name__ == "__main__":
+    main()
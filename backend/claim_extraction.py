@@ -1,12 +1,21 @@
-import os, json, torch, re
+import os, copy, zlib, torch, re, argparse
 from tqdm import tqdm
 from datetime import datetime
-from transformers import (
-    pipeline,
-    AutoTokenizer,
-    AutoModelForCausalLM,
-    BitsAndBytesConfig
-)
+
+try:
+    from services.stream_io import existing_path, iter_records, write_records, append_records
+    from services.verdict_cache import VerdictCache
+    from services.llm_backend import load_causal_lm, make_pipeline, supports_kv_reuse, last_token_logits
+    from services.early_stop import StopStats, json_object_closed
+    from claim_prefilter import ClaimPrefilter
+    from claim_workers import iter_results, unique_results
+except ImportError:
+    from backend.services.stream_io import existing_path, iter_records, write_records, append_records
+    from backend.services.verdict_cache import VerdictCache
+    from backend.services.llm_backend import load_causal_lm, make_pipeline, supports_kv_reuse, last_token_logits
+    from backend.services.early_stop import StopStats, json_object_closed
+    from backend.claim_prefilter import ClaimPrefilter
+    from backend.claim_workers import iter_results, unique_results
 
 # ======================================
 # 🔧 Config
@@ -17,9 +26,10 @@ os.environ["PYTORCH_CUDA_ALLOC_CONF"] = "max_split_size_mb:64"
 BASE_DIR = os.path.dirname(__file__)
 DATA_DIR = os.path.join(BASE_DIR, "data")
 
-INPUT_FILE = os.path.join(DATA_DIR, "crawled_sentences.json")
-OUTPUT_FILE = os.path.join(DATA_DIR, "claims_output.json")
-CHECKPOINT_FILE = os.path.join(DATA_DIR, "claims_checkpoint.json")
+# JSON lines; the *.json arrays written by older runs are still read (and migrated)
+INPUT_FILE = os.path.join(DATA_DIR, "crawled_sentences.jsonl")
+OUTPUT_FILE = os.path.join(DATA_DIR, "claims_output.jsonl")
+CHECKPOINT_FILE = os.path.join(DATA_DIR, "claims_checkpoint.jsonl")
 OFFLOAD_DIR = os.path.join(BASE_DIR, "offload_cache")
 
 MODEL = "Qwen/Qwen3-4B-Instruct-2507"
@@ -30,43 +40,47 @@ os.makedirs(OFFLOAD_DIR, exist_ok=True)
 # ======================================
 # ⚙️ Load Model
 # ======================================
-bnb_config = BitsAndBytesConfig(
-    load_in_4bit=True,
-    bnb_4bit_compute_dtype=torch.float16,
-    bnb_4bit_use_double_quant=True,
-)
-
-print(f"[{datetime.now().strftime('%H:%M:%S')}] 🔄 Loading model...")
-tokenizer = AutoTokenizer.from_pretrained(MODEL, trust_remote_code=True)
-model = AutoModelForCausalLM.from_pretrained(
-    MODEL,
-    device_map="auto",
-    quantization_config=bnb_config,
-    low_cpu_mem_usage=True,
-    offload_folder=OFFLOAD_DIR,
-    trust_remote_code=True,
-)
-model.eval()
-
-pipe = pipeline(
-    "text-generation",
-    model=model,
-    tokenizer=tokenizer,
-    torch_dtype=torch.float16,
-    trust_remote_code=True,
-    return_full_text=False,  
-)
-
-print(f"[{datetime.now().strftime('%H:%M:%S')}] ✅ Model loaded!\n")
+# LLM_BACKEND=auto picks 4-bit bitsandbytes on GPU and int8 dynamic quantization on CPU
+tokenizer, model, BACKEND = load_causal_lm(MODEL, offload_dir=OFFLOAD_DIR)
+pipe = make_pipeline(tokenizer, model, BACKEND)
+print()
 
 DEBUG = True
 
 # ======================================
-# 🧠 Single-Sentence JSON Classifier
+# 🧠 Batched JSON Classifier
 # ======================================
-@torch.inference_mode()
-def classify_sentence(sentence: str) -> bool:
-    prompt = f"""
+BATCH_SIZE = int(os.getenv("CLAIM_BATCH_SIZE", "16"))  # sentences per forward pass
+
+# "score": one forward pass, compare the YES / NO logits after the answer prefix
+# "generate": free generation + regex parse (original behaviour)
+CLASSIFY_MODE = os.getenv("CLAIM_MODE", "score")
+YES_THRESHOLD = float(os.getenv("CLAIM_YES_THRESHOLD", "0.5"))  # min P(YES) to keep a claim
+ANSWER_PREFIX = '{ "answer": "'
+# score mode: encode the instruction block before the sentence once and reuse its KV cache
+PREFIX_CACHE = os.getenv("CLAIM_PREFIX_CACHE", "1") != "0" and supports_kv_reuse(model)
+
+# Bump whenever build_prompt changes: cached verdicts are keyed on model + prompt version + mode
+# (score mode also records whether the prefix KV cache was used)
+PROMPT_VERSION = 1
+VERDICT_CACHE = os.getenv("CLAIM_VERDICT_CACHE", "1") != "0"
+verdict_cache = VerdictCache() if VERDICT_CACHE else None
+
+# rules + small CPU model decide the obvious sentences; see claim_prefilter.py.
+# Off by default until its agreement with the LLM is measured on LLM-only labels.
+PREFILTER = os.getenv("CLAIM_PREFILTER", "0") != "0"
+AUDIT_PERCENT = int(os.getenv("CLAIM_PREFILTER_AUDIT", "5"))  # prefilter decisions re-checked by the LLM
+prefilter = ClaimPrefilter.load() if PREFILTER else None
+
+# decoder-only batching: pad on the left so every prompt ends right before generation
+tokenizer.padding_side = "left"
+if tokenizer.pad_token is None:
+    tokenizer.pad_token = tokenizer.eos_token
+
+ANSWER_RE = re.compile(r'\{\s*"answer"\s*:\s*"(YES|NO)"\s*\}')
+
+def build_prompt(sentence: str) -> str:
+    return f"""
 Bạn là hệ thống phân loại câu.
 
 Nhiệm vụ:
@@ -93,76 +107,331 @@ hoặc
 
 Không viết gì khác.
 """
-    response = pipe(
-        [{"role": "user", "content": prompt}],
-        max_new_tokens=50,
-        temperature=0.0,
-        do_sample=False
-    )[0]["generated_text"]
 
-    print("-----")
-    print("Câu:", sentence)
-    print("Phân loại:", response)
-    print("-----\n")
-
-    match = re.search(r'\{\s*"answer"\s*:\s*"(YES|NO)"\s*\}', response)
+def parse_answer(response: str) -> bool:
+    match = ANSWER_RE.search(response)
     if not match:
         return False
-
     return match.group(1) == "YES"
 
+def chat_prompt(sentence: str) -> str:
+    """Full model input for scoring: chat template + assistant turn opened with ANSWER_PREFIX."""
+    messages = [{"role": "user", "content": build_prompt(sentence)}]
+    text = tokenizer.apply_chat_template(messages, tokenize=False, add_generation_prompt=True)
+    return text + ANSWER_PREFIX
+
+YES_ID = tokenizer.encode("YES", add_special_tokens=False)[0]
+NO_ID = tokenizer.encode("NO", add_special_tokens=False)[0]
+
+def prompt_ids(sentences: list[str]) -> list[list[int]]:
+    return tokenizer([chat_prompt(s) for s in sentences], add_special_tokens=False)["input_ids"]
+
+def shared_prefix_ids() -> list[int]:
+    """
+    Token ids every chat_prompt() starts with, cut at the last line break before
+    the sentence. Splitting the text at the sentence instead is not safe: the
+    pre-tokenizer glues the `"` of `Câu: "` to the letters after it, so the
+    tokens around the slot depend on the sentence. A newline token never merges
+    with what follows.
+    """
+    probes = prompt_ids(["A", "đây", "1", '"', " x", "("])
+    n = 0
+    while all(len(p) > n and p[n] == probes[0][n] for p in probes):
+        n += 1
+    while n > 0 and not tokenizer.decode(probes[0][n - 1:n]).endswith("\n"):
+        n -= 1
+    assert n > 0, "no line break before the sentence slot"
+    return probes[0][:n]
+
+PREFIX_IDS = shared_prefix_ids()
+
+_prefix_cache = None
+
+@torch.inference_mode()
+def prefix_cache():
+    """(prefix length, DynamicCache) for PREFIX_IDS, computed on first use."""
+    global _prefix_cache
+    if _prefix_cache is None:
+        ids = torch.tensor([PREFIX_IDS], dtype=torch.long, device=model.device)
+        out = model.get_decoder()(input_ids=ids, use_cache=True)
+        _prefix_cache = (ids.shape[1], out.past_key_values)
+        print(f"🧊 Cached KV for {ids.shape[1]}-token prompt prefix")
+    return _prefix_cache
+
+def yes_probs(logits):
+    pair = logits[:, [YES_ID, NO_ID]].float()
+    return torch.softmax(pair, dim=-1)[:, 0].tolist()
+
+@torch.inference_mode()
+def score_batch_cached(sentences: list[str]) -> list[float]:
+    """
+    Like score_batch_full, but only the tokens after PREFIX_IDS are run: they
+    attend to a per-batch copy of the prefix cache. Each row is cut from the
+    tokenized full prompt, so the model sees exactly the ids score_batch_full
+    would; a row that does not start with PREFIX_IDS sends the batch there.
+    Suffixes are padded on the right so every row continues from the prefix.
+    """
+    full = prompt_ids(sentences)
+    prefix_len = len(PREFIX_IDS)
+    if any(r[:prefix_len] != PREFIX_IDS for r in full):
+        print("⚠️ Prompt prefix tokenized differently; scoring this batch without the KV cache")
+        return score_batch_full(sentences)
+    rows = [r[prefix_len:] for r in full]
+
+    prefix_len, cache = prefix_cache()
+    cache = copy.deepcopy(cache)          # the forward pass appends to the cache
+    cache.batch_repeat_interleave(len(sentences))
+
+    lengths = [len(r) for r in rows]
+    width = max(lengths)
+    input_ids = torch.full((len(rows), width), tokenizer.pad_token_id, dtype=torch.long)
+    suffix_mask = torch.zeros((len(rows), width), dtype=torch.long)
+    for i, r in enumerate(rows):
+        input_ids[i, :len(r)] = torch.tensor(r)
+        suffix_mask[i, :len(r)] = 1
+
+    attention_mask = torch.cat([torch.ones((len(rows), prefix_len), dtype=torch.long), suffix_mask], dim=1)
+    position_ids = (prefix_len + torch.arange(width)).unsqueeze(0).expand(len(rows), -1)
+
+    out = model.get_decoder()(
+        input_ids=input_ids.to(model.device),
+        attention_mask=attention_mask.to(model.device),
+        position_ids=position_ids.to(model.device),
+        past_key_values=cache,
+        use_cache=True,
+    )
+    last = torch.tensor(lengths, device=model.device) - 1
+    hidden = out.last_hidden_state[torch.arange(len(rows), device=model.device), last]
+    return yes_probs(model.get_output_embeddings()(hidden))
+
+def score_batch(sentences: list[str]) -> list[float]:
+    """P(YES) for each sentence, renormalised over {YES, NO}."""
+    if PREFIX_CACHE:
+        return score_batch_cached(sentences)
+    return score_batch_full(sentences)
+
+@torch.inference_mode()
+def score_batch_full(sentences: list[str]) -> list[float]:
+    """P(YES) for each sentence from a single forward pass over the whole prompt."""
+    enc = tokenizer(
+        [chat_prompt(s) for s in sentences],
+        return_tensors="pt",
+        padding=True,
+        add_special_tokens=False,
+    ).to(model.device)
+    # left padding: real tokens get positions 0..n-1, like generate() would assign
+    position_ids = (enc["attention_mask"].cumsum(-1) - 1).clamp(min=0)
+
+    return yes_probs(last_token_logits(model, enc["input_ids"], enc["attention_mask"], position_ids))
+
+def cache_namespace() -> str:
+    # the cached and full score paths round differently, so their verdicts are kept apart
+    mode = CLASSIFY_MODE
+    if mode == "score":
+        mode += "-kv" if PREFIX_CACHE else "-full"
+    return f"{MODEL}|prompt-v{PROMPT_VERSION}|{mode}"
+
+def cached_verdict(entry) -> bool:
+    verdict, prob = entry
+    return prob >= YES_THRESHOLD if prob is not None else verdict
+
+def lookup_cached(sentences: list[str]) -> list:
+    """(verdict, prob) per sentence from the verdict cache, None where it has to go to the LLM."""
+    if verdict_cache is None:
+        return [None] * len(sentences)
+    keys = [VerdictCache.key(s, cache_namespace()) for s in sentences]
+    found = verdict_cache.get_many(keys)
+    return [found.get(k) for k in keys]
+
+def classify_uncached(sentences: list[str]) -> list[bool]:
+    """Run the LLM on sentences (no cache lookup) and record the verdicts in the cache."""
+    if CLASSIFY_MODE == "generate":
+        verdicts = generate_batch(sentences)
+        probs = [None] * len(sentences)
+    else:
+        probs = score_batch(sentences)
+        verdicts = [p >= YES_THRESHOLD for p in probs]
+        if DEBUG:
+            for sentence, p in zip(sentences, probs):
+                print(f"P(YES)={p:.3f} | {sentence}")
+
+    if verdict_cache is not None:
+        verdict_cache.put_many(zip(sentences, verdicts, probs), cache_namespace())
+    return verdicts
+
+def classify_batch(sentences: list[str]) -> list[bool]:
+    """Cascade: verdict cache -> prefilter -> LLM."""
+    verdicts = [None if c is None else cached_verdict(c) for c in lookup_cached(sentences)]
+    misses = [i for i, v in enumerate(verdicts) if v is None]
+    if misses and prefilter is not None:
+        for i, v in zip(misses, prefilter.decide_many([sentences[i] for i in misses])):
+            verdicts[i] = v
+        misses = [i for i in misses if verdicts[i] is None]
+    if misses:
+        for i, v in zip(misses, classify_uncached([sentences[i] for i in misses])):
+            verdicts[i] = v
+    return verdicts
+
+GENERATE_MAX_TOKENS = 50
+# generate mode: stop each row as soon as {"answer": ...} is closed
+json_stop = StopStats("claim JSON")
+
+@torch.inference_mode()
+def generate_batch(sentences: list[str]) -> list[bool]:
+    """Classify up to BATCH_SIZE sentences in one padded generate call."""
+    chats = [[{"role": "user", "content": build_prompt(s)}] for s in sentences]
+    outputs = pipe(
+        chats,
+        batch_size=len(chats),
+        max_new_tokens=GENERATE_MAX_TOKENS,
+        temperature=0.0,
+        do_sample=False,
+        stopping_criteria=json_stop.criteria(tokenizer, json_object_closed, GENERATE_MAX_TOKENS),
+    )
+
+    verdicts = []
+    for sentence, out in zip(sentences, outputs):
+        response = out[0]["generated_text"]
+        if DEBUG:
+            print("-----")
+            print("Câu:", sentence)
+            print("Phân loại:", response)
+            print("-----\n")
+        verdicts.append(parse_answer(response))
+    return verdicts
+
+def classify_sentence(sentence: str) -> bool:
+    return classify_batch([sentence])[0]
+
 # ======================================
-# 🧠 Extract claims (NO BATCH)
+# 🧠 Extract claims (BATCHED)
 # ======================================
 def extract_claims_from_sentences(sentences: list[str]) -> list[str]:
     claims = []
-    for s in sentences:
-        if classify_sentence(s):
-            claims.append(s.strip())
+    for i in range(0, len(sentences), BATCH_SIZE):
+        chunk = sentences[i:i + BATCH_SIZE]
+        for s, is_claim in zip(chunk, classify_batch(chunk)):
+            if is_claim:
+                claims.append(s.strip())
     return claims
 
+class BatchQueue:
+    """
+    Packs sentences from consecutive articles into fixed-size batches.
+    Sentences with a cached verdict, or one the prefilter is confident about,
+    are resolved on add, so batches only hold sentences that need the LLM.
+    A small audit sample of prefilter decisions still goes to the LLM to
+    measure agreement (the LLM verdict wins). An article is finished once all of its
+    sentences have a verdict; finished articles are written to the checkpoint
+    after every batch, in input order.
+    """
+
+    def __init__(self, batch_size):
+        self.batch_size = batch_size
+        self.articles = []   # in-flight articles, input order
+        self.queue = []      # (article, sentence index, prefilter verdict) waiting for the LLM
+        self.sentences_done = 0
+        self.cache_hits = 0
+        self.prefiltered = 0
+        self.audited = 0
+        self.audit_agree = 0
+
+    def add(self, article_id, url, sentences):
+        art = {"id": article_id, "url": url, "sentences": sentences,
+               "verdicts": [None] * len(sentences), "left": len(sentences)}
+        self.articles.append(art)
+        pending = []
+        for i, entry in enumerate(lookup_cached(sentences)):
+            if entry is None:
+                pending.append(i)
+            else:
+                self.resolve(art, i, cached_verdict(entry))
+                self.cache_hits += 1
+
+        decided = prefilter.decide_many([sentences[i] for i in pending]) if prefilter else [None] * len(pending)
+        for i, verdict in zip(pending, decided):
+            if verdict is None:
+                self.queue.append((art, i, None))
+            elif zlib.crc32(sentences[i].encode("utf-8")) % 100 < AUDIT_PERCENT:
+                self.queue.append((art, i, verdict))
+            else:
+                self.resolve(art, i, verdict)
+                self.prefiltered += 1
+
+    @staticmethod
+    def resolve(art, i, verdict):
+        art["verdicts"][i] = verdict
+        art["left"] -= 1
+
+    def ready(self):
+        return len(self.queue) >= self.batch_size
+
+    def run_batch(self):
+        """Classify one batch; return the records of articles that are now complete."""
+        batch, self.queue = self.queue[:self.batch_size], self.queue[self.batch_size:]
+        verdicts = classify_uncached([art["sentences"][i] for art, i, _ in batch])
+        for (art, i, pre), verdict in zip(batch, verdicts):
+            self.resolve(art, i, verdict)
+            if pre is not None:
+                self.audited += 1
+                self.audit_agree += pre == verdict
+        self.sentences_done += len(batch)
+        return self.pop_finished()
+
+    def pop_finished(self):
+        finished = []
+        while self.articles and self.articles[0]["left"] == 0:
+            art = self.articles.pop(0)
+            finished.append({
+                "id": art["id"],
+                "url": art["url"],
+                "claims": [s.strip() for s, v in zip(art["sentences"], art["verdicts"]) if v],
+                "timestamp": datetime.now().isoformat(timespec="seconds"),
+            })
+        return finished
+
 
 # ======================================
 # 📂 File helpers
 # ======================================
+def legacy_path(path):
+    return os.path.splitext(path)[0] + ".json"
+
 def load_articles():
-    with open(INPUT_FILE, "r", encoding="utf-8") as f:
-        data = json.load(f)
-        return data if isinstance(data, list) else [data]
-
-def load_existing(path):
-    if not os.path.exists(path):
-        return []
-    try:
-        with open(path, "r", encoding="utf-8") as f:
-            d = json.load(f)
-            return d if isinstance(d, list) else []
-    except:
-        return []
-
-def save_checkpoint(results, path):
-    tmp = path + ".tmp"
-    with open(tmp, "w", encoding="utf-8") as f:
-        json.dump(results, f, indent=2, ensure_ascii=False)
-    os.replace(tmp, path)
+    return iter_records(existing_path(INPUT_FILE, legacy_path(INPUT_FILE)))
+
+def migrate_checkpoint():
+    """Convert a legacy claims_checkpoint.json array into the append-only JSONL checkpoint."""
+    legacy = legacy_path(CHECKPOINT_FILE)
+    if not os.path.exists(CHECKPOINT_FILE) and os.path.exists(legacy):
+        n = write_records(CHECKPOINT_FILE, iter_records(legacy))
+        print(f"📦 Migrated {n} checkpoint rows → {CHECKPOINT_FILE}")
 
 
 # ======================================
 # 🚀 Main
 # ======================================
-def main():
-    articles = load_articles()
-    print(f"📂 Loaded {len(articles)} sentence-level articles")
+def main(batch_size: int = BATCH_SIZE):
+    migrate_checkpoint()
 
-    results = load_existing(OUTPUT_FILE)
-    checkpoint = load_existing(CHECKPOINT_FILE)
-
-    merged = {r["id"]: r for r in (results + checkpoint) if "id" in r}
-    done_ids = set(merged.keys())
+    # only ids are kept in memory; results themselves stay on disk
+    # (output, checkpoint and any claim_workers.py segments)
+    done_ids = {r["id"] for r in iter_results() if "id" in r}
+    print(f"📂 {len(done_ids)} articles already classified")
 
     start = datetime.now()
-
-    for article in tqdm(articles, desc="🧠 Classifying sentences"):
+    new_count = 0
+    queue = BatchQueue(batch_size)
+
+    def checkpoint(records):
+        # appended per batch, so an interrupted run resumes where it stopped
+        nonlocal new_count
+        if records:
+            append_records(CHECKPOINT_FILE, records)
+            new_count += len(records)
+
+    progress = tqdm(load_articles(), desc="🧠 Classifying sentences")
+    for article in progress:
         article_id = article["id"]
         if article_id in done_ids:
             continue
@@ -171,24 +440,44 @@ def main():
         if not sentences:
             continue
 
-        claims = extract_claims_from_sentences(sentences)
-        article_url = article.get("url", "")
-
-        merged[article_id] = {
-            "id": article_id,
-            "url": article_url,
-            "claims": claims,
-            "timestamp": datetime.now().isoformat(timespec="seconds"),
-        }
-
-        if len(merged) % 5 == 0:
-            save_checkpoint(list(merged.values()), CHECKPOINT_FILE)
-
-    save_checkpoint(list(merged.values()), OUTPUT_FILE)
-
-    print(f"\n✅ Done! Saved {len(merged)} results → {OUTPUT_FILE}")
+        queue.add(article_id, article.get("url", ""), sentences)
+        done_ids.add(article_id)
+        checkpoint(queue.pop_finished())   # fully cached articles need no batch
+
+        while queue.ready():
+            checkpoint(queue.run_batch())
+            elapsed = (datetime.now() - start).total_seconds()
+            progress.set_postfix(sent_per_s=f"{queue.sentences_done / max(elapsed, 1e-9):.1f}")
+
+    while queue.queue:
+        checkpoint(queue.run_batch())
+    checkpoint(queue.pop_finished())
+
+    total = write_records(OUTPUT_FILE, unique_results())
+
+    elapsed = (datetime.now() - start).total_seconds()
+    print(f"\n✅ Done! {new_count} new, saved {total} results → {OUTPUT_FILE}")
+    print(f"⚡ {queue.sentences_done} sentences in {elapsed:.1f}s "
+          f"({queue.sentences_done / max(elapsed, 1e-9):.1f} sentences/s, batch={batch_size}, mode={CLASSIFY_MODE})")
+    if CLASSIFY_MODE == "generate":
+        print(json_stop.summary())
+    if prefilter is not None:
+        needed = queue.prefiltered + queue.sentences_done
+        print(f"🔎 Prefilter decided {queue.prefiltered}/{needed} uncached sentences "
+              f"({queue.prefiltered / max(1, needed) * 100:.1f}% fewer LLM calls); "
+              f"audit agreement {queue.audit_agree}/{queue.audited} "
+              f"({queue.audit_agree / max(1, queue.audited) * 100:.1f}%)")
+    if verdict_cache is not None:
+        print(f"💾 Verdict cache: {queue.cache_hits} hits, {queue.sentences_done} LLM calls, {len(verdict_cache)} entries")
     print("⏱️ Runtime:", datetime.now() - start)
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Classify crawled sentences as factual claims")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="sentences per forward pass")
+    parser.add_argument("--mode", choices=["score", "generate"], default=CLASSIFY_MODE,
+                        help="score = YES/NO logits in one pass, generate = free generation + parse")
+    parser.add_argument("--threshold", type=float, default=YES_THRESHOLD, help="min P(YES) in score mode")
+    args = parser.parse_args()
+    CLASSIFY_MODE, YES_THRESHOLD = args.mode, args.threshold
+    main(batch_size=args.batch_size)
@@ -0,0 +1,165 @@
+import os, re, pickle, hashlib, argparse
+from datetime import datetime
+
+try:
+    from services.verdict_cache import VerdictCache
+except ImportError:
+    from backend.services.verdict_cache import VerdictCache
+
+# ======================================
+# 🔧 Config
+# ======================================
+BASE_DIR = os.path.dirname(__file__)
+DATA_DIR = os.path.join(BASE_DIR, "data")
+
+MODEL_FILE = os.path.join(DATA_DIR, "claim_prefilter.pkl")
+
+# P(claim) from the small model: below LOW -> NO, above HIGH -> YES, in between -> LLM
+LOW = float(os.getenv("PREFILTER_LOW", "0.1"))
+HIGH = float(os.getenv("PREFILTER_HIGH", "0.9"))
+HOLDOUT_PERCENT = 20   # sentences whose hash falls in this bucket are never trained on
+
+# ======================================
+# 📏 Rules
+# ======================================
+# Obviously not a factual statement: questions, advice, first-person opinion, direct quotes
+ADVICE_RE = re.compile(r"^(?:hãy|đừng|không nên|bạn nên|mọi người nên|nên)\b", re.IGNORECASE)
+OPINION_RE = re.compile(r"\b(?:tôi nghĩ|tôi cho rằng|theo tôi|tôi tin|có lẽ|dường như|hình như|e rằng)\b", re.IGNORECASE)
+QUOTE_ONLY_RE = re.compile(r'^["“][^"“”]*["”]\.?$')   # an unattributed direct quote
+
+# Obviously factual: a date, percentage or amount, stated without hedging
+DATE_RE = re.compile(r"\b(?:ngày|tháng|năm)\s+\d{1,4}\b|\b\d{1,2}/\d{1,2}(?:/\d{2,4})?\b", re.IGNORECASE)
+QUANTITY_RE = re.compile(r"\d+(?:[.,]\d+)?\s*(?:%|triệu|tỷ|nghìn|USD|đồng|người|ca\b)", re.IGNORECASE)
+HEDGE_RE = re.compile(r"\b(?:sẽ|có thể|dự kiến|dự báo|nên|cần|khuyến cáo|khuyên)\b", re.IGNORECASE)
+
+
+def rule_verdict(sentence):
+    """True / False when a rule is certain, None otherwise."""
+    s = sentence.strip()
+    if s.endswith("?"):
+        return False
+    if QUOTE_ONLY_RE.match(s):
+        return False
+    if ADVICE_RE.search(s) or OPINION_RE.search(s):
+        return False
+    if (DATE_RE.search(s) or QUANTITY_RE.search(s)) and not HEDGE_RE.search(s):
+        return True
+    return None
+
+
+def holdout(sentence):
+    return int(hashlib.md5(sentence.encode("utf-8")).hexdigest(), 16) % 100 < HOLDOUT_PERCENT
+
+
+# ======================================
+# 🧮 Cascade
+# ======================================
+class ClaimPrefilter:
+    """
+    Rules first, then a char n-gram TF-IDF + LogisticRegression model trained on
+    the LLM's own verdicts. decide_many() gives True / False for confident cases
+    and None for the uncertain middle, which still goes to the LLM.
+    """
+
+    def __init__(self, model=None, low=LOW, high=HIGH):
+        self.model = model
+        self.low = low
+        self.high = high
+
+    @classmethod
+    def load(cls, path=MODEL_FILE):
+        """Rules-only prefilter if no model was trained yet (or scikit-learn is missing)."""
+        if not os.path.exists(path):
+            return cls()
+        try:
+            with open(path, "rb") as f:
+                return cls(model=pickle.load(f))
+        except Exception as e:
+            print(f"⚠️ Could not load prefilter model ({e}); using rules only")
+            return cls()
+
+    def decide_many(self, sentences):
+        """Verdict per sentence: True / False when confident, None -> ask the LLM."""
+        verdicts = [rule_verdict(s) for s in sentences]
+        rest = [i for i, v in enumerate(verdicts) if v is None]
+        if self.model is not None and rest:
+            probs = self.model.predict_proba([sentences[i] for i in rest])[:, 1]
+            for i, p in zip(rest, probs):
+                if p >= self.high:
+                    verdicts[i] = True
+                elif p <= self.low:
+                    verdicts[i] = False
+        return verdicts
+
+
+# ======================================
+# 📂 Training data (LLM verdicts)
+# ======================================
+def load_labelled(namespace=None):
+    """
+    (sentence, llm_verdict) pairs from the verdict cache, which only ever holds
+    verdicts the LLM produced itself. claims_checkpoint is not used: with the
+    prefilter on it also contains the prefilter's own decisions, which would
+    feed back into training and inflate the measured agreement.
+    """
+    labels = {}
+    for sentence, verdict, ns in VerdictCache().labelled():
+        if namespace is None or ns == namespace:
+            labels[sentence] = verdict   # most recently used verdict wins
+    return list(labels.items())
+
+
+def evaluate(prefilter, samples):
+    decided = agree = 0
+    for (sentence, label), verdict in zip(samples, prefilter.decide_many([s for s, _ in samples])):
+        if verdict is None:
+            continue
+        decided += 1
+        agree += verdict == label
+    total = len(samples)
+    print(f"   held-out sentences : {total}")
+    print(f"   decided w/o LLM    : {decided} ({decided / max(1, total) * 100:.1f}% fewer LLM calls)")
+    print(f"   agreement with LLM : {agree}/{decided} ({agree / max(1, decided) * 100:.1f}%)")
+    return {"total": total, "decided": decided, "agree": agree}
+
+
+def train(namespace=None):
+    from sklearn.pipeline import make_pipeline
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.linear_model import LogisticRegression
+
+    samples = load_labelled(namespace)
+    train_set = [x for x in samples if not holdout(x[0])]
+    test_set = [x for x in samples if holdout(x[0])]
+    print(f"📂 {len(samples)} LLM-labelled sentences ({len(train_set)} train / {len(test_set)} held out)")
+    if not train_set or len({y for _, y in train_set}) < 2:
+        raise SystemExit("❌ Need LLM verdicts of both classes in the verdict cache to train "
+                         "(run claim_extraction.py with CLAIM_VERDICT_CACHE=1 first)")
+
+    print("\n📏 Rules only:")
+    evaluate(ClaimPrefilter(), test_set)
+
+    model = make_pipeline(
+        TfidfVectorizer(analyzer="char_wb", ngram_range=(2, 4), min_df=2, sublinear_tf=True, max_features=50000),
+        LogisticRegression(max_iter=1000, class_weight="balanced"),
+    )
+    model.fit([s for s, _ in train_set], [y for _, y in train_set])
+
+    print(f"\n🧮 Rules + model (low={LOW}, high={HIGH}):")
+    evaluate(ClaimPrefilter(model), test_set)
+
+    with open(MODEL_FILE, "wb") as f:
+        pickle.dump(model, f)
+    print(f"\n💾 [{datetime.now().strftime('%H:%M:%S')}] Saved prefilter model → {MODEL_FILE}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rule + small-model prefilter for claim classification")
+    parser.add_argument("command", choices=["train", "eval"], help="train on LLM verdicts / evaluate the saved model")
+    parser.add_argument("--namespace", default=None,
+                        help="only verdicts from this model|prompt|mode namespace (default: all)")
+    args = parser.parse_args()
+    if args.command == "train":
+        train(args.namespace)
+    else:
+        evaluate(ClaimPrefilter.load(), [x for x in load_labelled(args.namespace) if holdout(x[0])])
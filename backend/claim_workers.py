@@ -0,0 +1,177 @@
+import os, glob, socket, argparse
+from itertools import chain
+from datetime import datetime
+
+try:
+    from services.stream_io import existing_path, iter_records, write_records, append_records
+    from services.work_queue import WorkQueue
+except ImportError:
+    from backend.services.stream_io import existing_path, iter_records, write_records, append_records
+    from backend.services.work_queue import WorkQueue
+
+# ======================================
+# 🔧 Config
+# ======================================
+# Sharded claim extraction:
+#   python backend/claim_workers.py enqueue          # split new articles into work units
+#   python backend/claim_workers.py work [--worker]  # one per GPU (CUDA_VISIBLE_DEVICES), same data dir
+#   python backend/claim_workers.py merge            # fold worker segments into claims_output.jsonl
+#   python backend/claim_workers.py requeue          # retry units that failed WORK_MAX_ATTEMPTS times
+BASE_DIR = os.path.dirname(__file__)
+DATA_DIR = os.path.join(BASE_DIR, "data")
+
+INPUT_FILE = os.path.join(DATA_DIR, "crawled_sentences.jsonl")
+OUTPUT_FILE = os.path.join(DATA_DIR, "claims_output.jsonl")
+CHECKPOINT_FILE = os.path.join(DATA_DIR, "claims_checkpoint.jsonl")
+QUEUE_DB = os.path.join(DATA_DIR, "claim_queue.sqlite")
+SEGMENT_DIR = os.path.join(DATA_DIR, "claims_segments")   # one append-only JSONL file per worker
+
+UNIT_SIZE = int(os.getenv("CLAIM_UNIT_SIZE", "32"))   # articles per work unit
+
+
+def legacy_path(path):
+    return os.path.splitext(path)[0] + ".json"
+
+
+# ======================================
+# 📂 Results (output + checkpoint + worker segments)
+# ======================================
+def segment_path(worker):
+    return os.path.join(SEGMENT_DIR, f"{worker}.jsonl")
+
+def iter_segments():
+    for path in sorted(glob.glob(os.path.join(SEGMENT_DIR, "*.jsonl"))):
+        yield from iter_records(path)
+
+def iter_results():
+    """Every classified article on disk, in the order merge() prefers them."""
+    return chain(
+        iter_records(existing_path(OUTPUT_FILE, legacy_path(OUTPUT_FILE))),
+        iter_records(CHECKPOINT_FILE),
+        iter_segments(),
+    )
+
+def unique_results():
+    """First occurrence of each id, streamed (a unit re-run after a crash may appear twice)."""
+    seen = set()
+    for r in iter_results():
+        if "id" in r and r["id"] not in seen:
+            seen.add(r["id"])
+            yield r
+
+
+# ======================================
+# 📥 Enqueue
+# ======================================
+def enqueue(unit_size=UNIT_SIZE):
+    # anything without a result is (re-)enqueued unless a live or failed unit already holds it
+    done_ids = {r["id"] for r in iter_results() if "id" in r}
+    articles = (
+        {"id": a["id"], "url": a.get("url", ""), "sentences": a["sentences"]}
+        for a in iter_records(existing_path(INPUT_FILE, legacy_path(INPUT_FILE)))
+        if a.get("id") and a.get("sentences") and a["id"] not in done_ids
+    )
+    queue = WorkQueue(QUEUE_DB)
+    units, added = queue.put(articles, key=lambda a: a["id"], unit_size=unit_size)
+    print(f"📥 Enqueued {added} articles in {units} units ({len(done_ids)} already classified)")
+    stats = queue.stats()
+    print(f"📊 Queue: {stats}")
+    if stats["failed"]:
+        print(f"⚠️ {stats['failed']} failed units are parked; `claim_workers.py requeue` retries them")
+
+
+def requeue():
+    queue = WorkQueue(QUEUE_DB)
+    print(f"🔁 Requeued {queue.requeue_failed()} failed units")
+    print(f"📊 Queue: {queue.stats()}")
+
+
+# ======================================
+# 🧠 Worker
+# ======================================
+def work(worker, batch_size=None):
+    try:
+        import claim_extraction as ce
+    except ImportError:
+        from backend import claim_extraction as ce
+
+    batch_size = batch_size or ce.BATCH_SIZE
+    queue = WorkQueue(QUEUE_DB)
+    segment = segment_path(worker)
+    os.makedirs(SEGMENT_DIR, exist_ok=True)
+    print(f"👷 Worker {worker} → {segment}")
+
+    start = datetime.now()
+    units = articles = sentences = 0
+    while True:
+        unit = queue.claim(worker)
+        if unit is None:
+            break
+        unit_id, items = unit
+
+        try:
+            batches = ce.BatchQueue(batch_size)
+            records = []
+            for art in items:
+                batches.add(art["id"], art.get("url", ""), art["sentences"])
+                records += batches.pop_finished()
+            while batches.queue:
+                records += batches.run_batch()
+                if not queue.renew(unit_id, worker):
+                    print(f"⚠️ Lease on unit {unit_id} expired; another worker may redo it")
+            records += batches.pop_finished()
+        except (KeyboardInterrupt, SystemExit):
+            queue.release(unit_id, worker)
+            raise
+        except Exception as e:
+            # counted against the unit: one bad article must not crash every worker forever
+            queue.fail(unit_id, worker)
+            print(f"❌ Unit {unit_id} failed: {e.__class__.__name__}: {e}")
+            continue
+
+        # results first, then the queue: a crash in between only causes a duplicate, never a loss
+        append_records(segment, records)
+        queue.complete(unit_id, worker)
+
+        units += 1
+        articles += len(records)
+        sentences += batches.sentences_done
+        elapsed = (datetime.now() - start).total_seconds()
+        print(f"✅ Unit {unit_id}: {len(records)} articles "
+              f"({units} units, {sentences / max(elapsed, 1e-9):.1f} LLM sentences/s)")
+
+    print(f"\n🏁 Worker {worker} idle: {units} units, {articles} articles, {sentences} LLM sentences")
+    print(f"📊 Queue: {queue.stats()}")
+    print("⏱️ Runtime:", datetime.now() - start)
+
+
+# ======================================
+# 🧩 Merge
+# ======================================
+def merge():
+    stats = WorkQueue(QUEUE_DB).stats() if os.path.exists(QUEUE_DB) else {}
+    if stats.get("pending") or stats.get("leased"):
+        print(f"⚠️ Queue not drained yet ({stats}); merging what is finished so far")
+    total = write_records(OUTPUT_FILE, unique_results())
+    print(f"✅ Merged {total} results → {OUTPUT_FILE}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sharded claim extraction over a shared work queue")
+    parser.add_argument("command", choices=["enqueue", "work", "merge", "requeue", "status"])
+    parser.add_argument("--worker", default=f"{socket.gethostname()}-{os.getpid()}",
+                        help="worker name; results go to claims_segments/<worker>.jsonl")
+    parser.add_argument("--batch-size", type=int, default=None, help="sentences per forward pass")
+    parser.add_argument("--unit-size", type=int, default=UNIT_SIZE, help="articles per work unit (enqueue)")
+    args = parser.parse_args()
+
+    if args.command == "enqueue":
+        enqueue(args.unit_size)
+    elif args.command == "work":
+        work(args.worker, args.batch_size)
+    elif args.command == "merge":
+        merge()
+    elif args.command == "requeue":
+        requeue()
+    else:
+        print(f"📊 Queue: {WorkQueue(QUEUE_DB).stats()}")
@@ -1,4 +1,4 @@
-import os, torch, json , re, pickle, string
+import os, torch, json , re, pickle, string, time, argparse, hashlib, unicodedata
 import numpy as np
 from tqdm import tqdm
 from transformers import pipeline, AutoTokenizer, AutoModel
@@ -6,10 +6,21 @@ from underthesea import word_tokenize, pos_tag
 from collections import Counter
 from sklearn.metrics.pairwise import cosine_similarity
 
+try:
+    from services.stream_io import existing_path, iter_records, write_records, append_records
+    from claim_workers import unique_results
+except ImportError:
+    from backend.services.stream_io import existing_path, iter_records, write_records, append_records
+    from backend.claim_workers import unique_results
+
 BASE_DIR = os.path.dirname(__file__)
 DATA_DIR = os.path.join(BASE_DIR, "data")
-INPUT_FILE = os.path.join(DATA_DIR, "claims_checkpoint.json")
-OUTPUT_FILE = os.path.join(DATA_DIR, "claims_enriched.json")
+# Input is every classified article (claims_output + checkpoint + worker segments,
+# see claim_workers.unique_results); legacy *.json arrays are still accepted
+OUTPUT_FILE = os.path.join(DATA_DIR, "claims_enriched.jsonl")
+# XNLI topic of every kept claim from the last complete nli run; the embedding
+# engine trains and is evaluated on these, so an embedding run can't overwrite them
+NLI_LABELS_FILE = os.path.join(DATA_DIR, "topic_labels_xnli.jsonl")
 
 # ======================================================
 # STAGE 1️⃣ — TOPIC CLASSIFICATION (with filtering)
@@ -27,39 +38,129 @@ TOPIC_LABELS = [
 ]
 MIN_CONFIDENCE = 0.5
 
-print("🔹 Loading zero-shot topic classifier (joeddav/xlm-roberta-large-xnli)...")
-classifier = pipeline(
-    "zero-shot-classification",
-    model="joeddav/xlm-roberta-large-xnli",
-    device=0 if torch.cuda.is_available() else -1
-)
-print("✅ Topic model loaded.\n")
+# premise x label NLI pairs per forward pass; claims from many articles share a batch
+TOPIC_BATCH_SIZE = int(os.getenv("TOPIC_BATCH_SIZE", "72"))
+TOPIC_BUFFER = 8   # forward passes' worth of claims collected, then length-sorted to cut padding
+HYPOTHESIS_TEMPLATE = "This example is {}."   # zero-shot pipeline default
+
+# "nli": XNLI zero-shot, one cross-encoder pass per claim x label
+# "embedding": one e5 embedding per claim scored against label centroids (+ trained head)
+TOPIC_ENGINE = os.getenv("TOPIC_ENGINE", "nli")
+
+classifier = nli_model = nli_tokenizer = None
+ENTAILMENT_ID = CONTRADICTION_ID = None
+
+def load_nli():
+    """The XNLI model is only loaded when the nli engine is actually used."""
+    global classifier, nli_model, nli_tokenizer, ENTAILMENT_ID, CONTRADICTION_ID
+    if classifier is not None:
+        return
+    print("🔹 Loading zero-shot topic classifier (joeddav/xlm-roberta-large-xnli)...")
+    classifier = pipeline(
+        "zero-shot-classification",
+        model="joeddav/xlm-roberta-large-xnli",
+        device=0 if torch.cuda.is_available() else -1
+    )
+    nli_model, nli_tokenizer = classifier.model, classifier.tokenizer
+    ENTAILMENT_ID = next((i for l, i in nli_model.config.label2id.items() if l.lower().startswith("entail")), -1)
+    CONTRADICTION_ID = -1 if ENTAILMENT_ID == 0 else 0
+    print("✅ Topic model loaded.\n")
+
+
+def topic_prompt(claim_text):
+    return (
+        f"Đây là một câu trong bài báo tiếng Việt: '{claim_text}'. "
+        "Hãy xác định chủ đề phù hợp nhất trong danh sách sau."
+    )
+
+def topic_scores(texts, batch_size=TOPIC_BATCH_SIZE, engine=TOPIC_ENGINE):
+    """(claims x TOPIC_LABELS) confidence matrix from the selected engine."""
+    if engine == "embedding":
+        return embedding_topic_scores(texts)
+    load_nli()
+    return nli_topic_scores([topic_prompt(t) for t in texts], batch_size)
+
+@torch.inference_mode()
+def nli_topic_scores(prompts, batch_size=TOPIC_BATCH_SIZE):
+    """
+    P(entailment) for every (prompt, label) pair -- the same numbers the
+    zero-shot pipeline gives with multi_label=True, but pairs from many claims
+    are packed into each padded forward pass instead of 9 pairs per call.
+    """
+    hypotheses = [HYPOTHESIS_TEMPLATE.format(label) for label in TOPIC_LABELS]
+    pairs = [(p, h) for p in prompts for h in hypotheses]
+    order = sorted(range(len(pairs)), key=lambda k: len(pairs[k][0]))
+    probs = np.zeros(len(pairs), dtype=np.float32)
+
+    for i in range(0, len(order), batch_size):
+        idx = order[i:i + batch_size]
+        inputs = nli_tokenizer(
+            [pairs[k][0] for k in idx],
+            [pairs[k][1] for k in idx],
+            padding=True,
+            truncation="only_first",
+            return_tensors="pt"
+        ).to(nli_model.device)
+        logits = nli_model(**inputs).logits[:, [CONTRADICTION_ID, ENTAILMENT_ID]].float()
+        probs[idx] = torch.softmax(logits, dim=-1)[:, 1].cpu().numpy()
+
+    return probs.reshape(len(prompts), len(hypotheses))
 
 
 # FIX: claim is now an object, so claim["text"], not the raw string
-def classify_topics(articles):
-    filtered = []
-    total_in, total_out = 0, 0
+# Stages are generators: articles are buffered only until a few NLI batches are full.
+def classify_topics(articles, batch_size=TOPIC_BATCH_SIZE, engine=TOPIC_ENGINE):
+    stats = {"in": 0, "out": 0, "seconds": 0.0}
+    flush_at = max(1, batch_size // len(TOPIC_LABELS)) * TOPIC_BUFFER
+    buffer, buffered_claims = [], 0
+    # nli runs refresh the label snapshot, swapped in only once the run completes
+    partial = NLI_LABELS_FILE + ".partial" if engine == "nli" else None
+    if partial and os.path.exists(partial):
+        os.remove(partial)
+
+    def flush():
+        labelled = list(label_topics(buffer, batch_size, engine, stats))
+        if partial:
+            append_records(partial, ({"text": c["text"], "topic": c["topic"], "confidence": c["confidence"]}
+                                     for art in labelled for c in art["claims"]))
+        return labelled
 
     for art in tqdm(articles, desc="📊 Classifying topics"):
+        buffer.append(art)
+        buffered_claims += len(art["claims"])
+        if buffered_claims >= flush_at:
+            yield from flush()
+            buffer, buffered_claims = [], 0
+    yield from flush()
+
+    if partial and os.path.exists(partial):
+        os.replace(partial, NLI_LABELS_FILE)
+        print(f"💾 XNLI topic labels → {NLI_LABELS_FILE}")
+
+    total_in, total_out = stats["in"], stats["out"]
+    drop_ratio = (total_in - total_out) / max(1, total_in) * 100
+    print(f"\n✅ Topic filtering done — {total_out}/{total_in} kept ({100 - drop_ratio:.1f}%)")
+    print(f"⚡ {total_in} claims in {stats['seconds']:.1f}s of topic scoring "
+          f"({total_in / max(stats['seconds'], 1e-9):.1f} claims/s, engine={engine}, batch={batch_size})\n")
+
+def label_topics(articles, batch_size, engine, stats):
+    # FIX: extract text properly
+    texts = [claim["text"].strip() for art in articles for claim in art["claims"]]
+    start = time.perf_counter()
+    scores = topic_scores(texts, batch_size, engine) if texts else None
+    stats["seconds"] += time.perf_counter() - start
+    stats["in"] += len(texts)
+
+    row = 0
+    for art in articles:
         kept_claims = []
 
-        for claim in art["claims"]:
-            total_in += 1
-            
-            # FIX: extract text properly
-            claim_text = claim["text"].strip()
-
-            prompt = (
-                f"Đây là một câu trong bài báo tiếng Việt: '{claim_text}'. "
-                "Hãy xác định chủ đề phù hợp nhất trong danh sách sau."
-            )
-
-            result = classifier(prompt, TOPIC_LABELS, multi_label=True)
-            scores, labels = result["scores"], result["labels"]
+        for _ in art["claims"]:
+            claim_text, claim_scores = texts[row], scores[row]
+            row += 1
 
-            top_idx = int(np.argmax(scores))
-            top_label, top_score = labels[top_idx], float(scores[top_idx])
+            top_idx = int(np.argmax(claim_scores))
+            top_label, top_score = TOPIC_LABELS[top_idx], float(claim_scores[top_idx])
 
             if top_score < MIN_CONFIDENCE:
                 continue
@@ -67,28 +168,30 @@ def classify_topics(articles):
             kept_claims.append({
                 "text": claim_text,
                 "topic": top_label,
-                "confidence": round(top_score, 3)
+                "confidence": round(top_score, 3),
+                "topic_engine": engine
             })
-            total_out += 1
+            stats["out"] += 1
 
         if kept_claims:
             art["claims"] = kept_claims
-            filtered.append(art)
-
-    drop_ratio = (total_in - total_out) / max(1, total_in) * 100
-    print(f"\n✅ Topic filtering done — {total_out}/{total_in} kept ({100 - drop_ratio:.1f}%)\n")
-    return filtered
+            yield art
 
 
 # ======================================================
 # STAGE 2️⃣ — NER (Electra-based + DATE regex)
 # ======================================================
-print("🔹 Loading NER model (NlpHUST/ner-vietnamese-electra-base)...")
+NER_MODEL = "NlpHUST/ner-vietnamese-electra-base"
+NER_BATCH_SIZE = int(os.getenv("NER_BATCH_SIZE", "32"))   # claims per NER forward pass
+NER_BUFFER = 4   # forward passes' worth of claims collected before tagging
+
+print(f"🔹 Loading NER model ({NER_MODEL})...")
 ner_pipeline = pipeline(
     "token-classification",
-    model="NlpHUST/ner-vietnamese-electra-base",
-    tokenizer="NlpHUST/ner-vietnamese-electra-base",
-    aggregation_strategy="simple"
+    model=NER_MODEL,
+    tokenizer=NER_MODEL,
+    aggregation_strategy="simple",
+    device=0 if torch.cuda.is_available() else -1
 )
 print("✅ NER model loaded.\n")
 
@@ -101,28 +204,80 @@ DATE_PATTERNS = [
     r"\b(?:hôm nay|ngày mai|hôm qua)\b",
     r"\b(?:mùa xuân|mùa hè|mùa thu|mùa đông)\b",
 ]
+DATE_RES = [re.compile(p, re.IGNORECASE) for p in DATE_PATTERNS]   # compiled once, not per claim
 
 def extract_dates(text):
-    found = []
-    for pattern in DATE_PATTERNS:
-        for m in re.finditer(pattern, text, flags=re.IGNORECASE):
+    # one scan per pattern, as before; nested spans ("2020" in "năm 2020") are kept
+    found, seen = [], set()
+    for date_re in DATE_RES:
+        for m in date_re.finditer(text):
+            if m.span() in seen:   # only the exact same span twice
+                continue
+            seen.add(m.span())
             found.append({"label": "DATE", "text": m.group(), "start": m.start(), "end": m.end(), "score": 1.0})
     return found
 
-def add_entities(articles):
-    enriched = []
-    for art in tqdm(articles, desc="🔍 Extracting entities"):
-        new_claims = []
-        for c in art["claims"]:
-            text = c["text"]
-            ents = ner_pipeline(text)
-            entities = [{"label": e["entity_group"], "text": e["word"], "score": float(e["score"])} for e in ents]
-            entities += extract_dates(text)
-            c["entities"] = entities
-            new_claims.append(c)
-        art["claims"] = new_claims
-        enriched.append(art)
-    return enriched
+# NER output per normalized claim; identical claims across articles are tagged once
+ENTITY_CACHE_FILE = os.path.join(DATA_DIR, "entity_cache.pkl")
+entity_cache = {}
+if os.path.exists(ENTITY_CACHE_FILE):
+    with open(ENTITY_CACHE_FILE, "rb") as f:
+        entity_cache = pickle.load(f)
+
+def entity_key(text):
+    normalized = " ".join(unicodedata.normalize("NFC", text).split())
+    return hashlib.sha1(f"{NER_MODEL}\x00{normalized}".encode("utf-8")).hexdigest()
+
+def save_entity_cache():
+    tmp = ENTITY_CACHE_FILE + ".tmp"
+    with open(tmp, "wb") as f:
+        pickle.dump(entity_cache, f)
+    os.replace(tmp, ENTITY_CACHE_FILE)
+
+def tag_entities(texts, batch_size=NER_BATCH_SIZE):
+    """NER entities per text; uncached texts go through the pipeline in batches."""
+    keys = [entity_key(t) for t in texts]
+    todo = {}
+    for k, t in zip(keys, texts):
+        if k not in entity_cache and k not in todo:
+            todo[k] = t
+
+    if todo:
+        results = ner_pipeline(list(todo.values()), batch_size=batch_size)
+        for k, ents in zip(todo, results):
+            entity_cache[k] = [{"label": e["entity_group"], "text": e["word"], "score": float(e["score"])} for e in ents]
+
+    return [entity_cache[k] for k in keys], len(todo)
+
+def add_entities(articles, batch_size=NER_BATCH_SIZE):
+    stats = {"claims": 0, "tagged": 0}
+    flush_at = batch_size * NER_BUFFER
+    buffer, buffered_claims = [], 0
+
+    def flush():
+        texts = [c["text"] for art in buffer for c in art["claims"]]
+        entities, tagged = tag_entities(texts, batch_size)
+        stats["claims"] += len(texts)
+        stats["tagged"] += tagged
+
+        row = 0
+        for art in buffer:
+            for c in art["claims"]:
+                c["entities"] = [dict(e) for e in entities[row]] + extract_dates(c["text"])
+                row += 1
+            yield art
+
+    for art in articles:
+        buffer.append(art)
+        buffered_claims += len(art["claims"])
+        if buffered_claims >= flush_at:
+            yield from flush()
+            buffer, buffered_claims = [], 0
+    yield from flush()
+
+    save_entity_cache()
+    print(f"\n🏷️ NER: {stats['tagged']} claims tagged, {stats['claims'] - stats['tagged']} reused from cache "
+          f"({len(entity_cache)} cached)\n")
 
 
 # ======================================================
@@ -235,8 +390,7 @@ def dedupe_keywords(kws):
     return final
 
 def add_keywords(articles):
-    final = []
-    for art in tqdm(articles, desc="💡 Extracting keywords"):
+    for art in articles:
         new_claims = []
         for c in art["claims"]:
             text = c["text"]
@@ -246,57 +400,216 @@ def add_keywords(articles):
             c["keywords"] = kws
             new_claims.append(c)
         art["claims"] = new_claims
-        final.append(art)
-    return final
+        yield art
+
+
+# ======================================================
+# TOPIC ENGINE — EMBEDDINGS (alternative to NLI)
+# ======================================================
+# A few descriptions per label; their mean e5 embedding is the label centroid
+TOPIC_DESCRIPTIONS = {
+    "Sức khỏe & Y tế": ["bệnh tật, bệnh viện, bác sĩ, điều trị và thuốc",
+                        "dịch bệnh, tiêm chủng, sức khỏe cộng đồng",
+                        "triệu chứng, chẩn đoán và phòng bệnh"],
+    "Dinh dưỡng & Thực phẩm": ["chế độ ăn uống, dinh dưỡng, vitamin và khoáng chất",
+                               "thực phẩm, món ăn, an toàn vệ sinh thực phẩm",
+                               "ngộ độc thực phẩm, đồ uống và thực phẩm chức năng"],
+    "Tai nạn & An toàn": ["tai nạn giao thông, va chạm, thương vong",
+                          "cháy nổ, đuối nước, tai nạn lao động",
+                          "an toàn, cứu hộ, cấp cứu nạn nhân"],
+    "Lối sống & Thói quen": ["thói quen sinh hoạt hằng ngày, giấc ngủ, tập thể dục",
+                             "lối sống lành mạnh, căng thẳng, sức khỏe tinh thần",
+                             "làm đẹp, chăm sóc bản thân và gia đình"],
+    "Trẻ em & Giáo dục": ["trẻ em, trẻ sơ sinh, chăm sóc con cái",
+                          "học sinh, trường học, thi cử và giáo viên",
+                          "giáo dục, đại học, tuyển sinh"],
+    "Thể thao": ["bóng đá, trận đấu, cầu thủ, huấn luyện viên",
+                 "giải đấu, vận động viên, huy chương",
+                 "thể thao, thi đấu và kết quả trận đấu"],
+    "Công nghệ & Khoa học": ["công nghệ, điện thoại, phần mềm, trí tuệ nhân tạo",
+                             "nghiên cứu khoa học, nhà khoa học, phát hiện mới",
+                             "internet, mạng xã hội, thiết bị điện tử"],
+    "Xã hội & Pháp luật": ["pháp luật, công an, tòa án, vụ án",
+                           "tội phạm, bắt giữ, xử phạt vi phạm",
+                           "xã hội, chính sách, đời sống người dân"],
+    "Giải trí & Văn hóa": ["ca sĩ, diễn viên, phim ảnh, âm nhạc",
+                           "nghệ thuật, văn hóa, lễ hội, du lịch",
+                           "giải trí, người nổi tiếng, chương trình truyền hình"],
+}
+TOPIC_TEMPERATURE = float(os.getenv("TOPIC_TEMPERATURE", "0.01"))   # softmax over centroid cosines
+TOPIC_EMBED_BATCH = 64
+TOPIC_HEAD_FILE = os.path.join(DATA_DIR, "topic_head.pkl")
+HOLDOUT_PERCENT = 20   # claims whose hash falls in this bucket are never trained on
+
+_topic_centroids = None
+_topic_head = None
+_scorer_logged = False
+
+def embed_claims(texts):
+    if not texts:
+        return np.zeros((0, e5_model.config.hidden_size), dtype=np.float32)
+    # same "query: " text as rank_keywords, so the keyword stage reuses these embeddings
+    queries = [f"query: {t}" for t in texts]
+    return np.vstack([get_embeds(queries[i:i + TOPIC_EMBED_BATCH])
+                      for i in range(0, len(queries), TOPIC_EMBED_BATCH)])
+
+def topic_centroids():
+    """(len(TOPIC_LABELS), dim) unit-norm centroid matrix, computed on first use."""
+    global _topic_centroids
+    if _topic_centroids is None:
+        rows = []
+        for label in TOPIC_LABELS:
+            embs = embed_claims([label] + TOPIC_DESCRIPTIONS[label])
+            c = embs.mean(axis=0)
+            rows.append(c / np.linalg.norm(c))
+        _topic_centroids = np.vstack(rows)
+    return _topic_centroids
+
+def load_topic_head(path=TOPIC_HEAD_FILE):
+    """Trained LogisticRegression head, or None (centroids only) if none was trained yet."""
+    global _topic_head
+    if _topic_head is None and os.path.exists(path):
+        with open(path, "rb") as f:
+            _topic_head = pickle.load(f)
+    return _topic_head
+
+def centroid_scores(embs):
+    sims = embs @ topic_centroids().T / TOPIC_TEMPERATURE
+    sims -= sims.max(axis=1, keepdims=True)
+    probs = np.exp(sims)
+    return probs / probs.sum(axis=1, keepdims=True)
+
+def head_scores(head, embs):
+    probs = np.zeros((len(embs), len(TOPIC_LABELS)), dtype=np.float32)
+    cols = [TOPIC_LABELS.index(c) for c in head.classes_]
+    probs[:, cols] = head.predict_proba(embs)
+    return probs
+
+def embedding_topic_scores(texts):
+    global _scorer_logged
+    embs = embed_claims(texts)
+    head = load_topic_head()
+    if not _scorer_logged:
+        print(f"🧭 Embedding topics scored by {f'the trained head ({TOPIC_HEAD_FILE})' if head is not None else 'label centroids (no trained head)'}")
+        _scorer_logged = True
+    return head_scores(head, embs) if head is not None else centroid_scores(embs)
+
+
+# ---------------- accuracy vs. XNLI ----------------
+def holdout(text):
+    return int(hashlib.md5(text.encode("utf-8")).hexdigest(), 16) % 100 < HOLDOUT_PERCENT
+
+def load_nli_topics():
+    """(claim text, XNLI topic) from the last nli run's snapshot, else from an nli-written claims_enriched."""
+    path = existing_path(NLI_LABELS_FILE, OUTPUT_FILE, os.path.splitext(OUTPUT_FILE)[0] + ".json")
+    seen = set()
+    for c in iter_records(path):
+        text, topic = c.get("text", "").strip(), c.get("topic")
+        if c.get("topic_engine", "nli") != "nli" or topic not in TOPIC_LABELS or text in seen:
+            continue
+        seen.add(text)
+        yield text, topic
+
+def report_agreement(name, scores, labels):
+    pred = scores.argmax(axis=1)
+    gold = np.array([TOPIC_LABELS.index(l) for l in labels])
+    kept = scores.max(axis=1) >= MIN_CONFIDENCE
+    print(f"\n{name}:")
+    print(f"   agreement with XNLI topic : {(pred == gold).mean() * 100:.1f}% of {len(gold)} claims")
+    print(f"   kept at MIN_CONFIDENCE    : {kept.mean() * 100:.1f}% (XNLI kept all of these)")
+    for i, label in enumerate(TOPIC_LABELS):
+        mask = gold == i
+        if mask.any():
+            print(f"   {label:<24} {(pred[mask] == i).mean() * 100:5.1f}%  (n={mask.sum()})")
+
+def evaluate_topic_engine(train=False):
+    global _topic_head
+    samples = list(load_nli_topics())
+    if not samples:
+        raise SystemExit(f"❌ No XNLI topics in {NLI_LABELS_FILE}; run the enrichment with TOPIC_ENGINE=nli first")
+    train_set = [x for x in samples if not holdout(x[0])]
+    test_set = [x for x in samples if holdout(x[0])]
+    print(f"📂 {len(samples)} XNLI-labelled claims ({len(train_set)} train / {len(test_set)} held out)")
+
+    if train:
+        from sklearn.linear_model import LogisticRegression
+        if len({y for _, y in train_set}) < 2:
+            raise SystemExit("❌ Need at least two XNLI topics to train the head")
+        head = LogisticRegression(max_iter=2000, C=4.0)
+        head.fit(embed_claims([t for t, _ in train_set]), [y for _, y in train_set])
+        with open(TOPIC_HEAD_FILE, "wb") as f:
+            pickle.dump(head, f)
+        _topic_head = head
+        print(f"💾 Saved topic head → {TOPIC_HEAD_FILE}")
+
+    if not test_set:
+        print(f"⚠️ No held-out claims to evaluate on ({HOLDOUT_PERCENT}% of {len(samples)} land in the hold-out bucket)")
+        return
+
+    start = time.perf_counter()
+    embs = embed_claims([t for t, _ in test_set])
+    elapsed = time.perf_counter() - start
+    labels = [y for _, y in test_set]
+    print(f"⚡ Embedded {len(test_set)} held-out claims in {elapsed:.1f}s "
+          f"({len(test_set) / max(elapsed, 1e-9):.1f} claims/s)")
+
+    report_agreement("🧭 Centroids only", centroid_scores(embs), labels)
+    head = load_topic_head()
+    if head is not None:
+        report_agreement("🧮 Centroids + trained head", head_scores(head, embs), labels)
 
 
 # ======================================================
 # FLATTEN
 # ======================================================
 def flatten_claims(articles):
-    flat = []
     for art in articles:
         art_id = art.get("id")
         art_url = art.get("url", "")
 
         for c in art["claims"]:
-            flat.append({
+            yield {
                 "article_id": art_id,
                 "url": art_url,
                 **c
-            })
-    return flat
+            }
 
 # ======================================================
 # MAIN PIPELINE
 # ======================================================
-def main():
-    print(f"📂 Loading cleaned claims from {INPUT_FILE}")
-    with open(INPUT_FILE, "r", encoding="utf-8") as f:
-        data = json.load(f)
-
-    if isinstance(data, dict):
-        data = [data]
+def main(topic_batch_size=TOPIC_BATCH_SIZE, topic_engine=TOPIC_ENGINE):
+    print("📂 Streaming classified articles (claims_output + checkpoint + worker segments)")
 
     # FIX: missing bracket and normalize claims
-    for art in data:
-        art["claims"] = [
-            {"text": c} if isinstance(c, str) else c
-            for c in art["claims"]
-        ]
-
-    step1 = classify_topics(data)
+    def normalized(records):
+        for art in records:
+            art["claims"] = [
+                {"text": c} if isinstance(c, str) else c
+                for c in art["claims"]
+            ]
+            yield art
+
+    step1 = classify_topics(normalized(unique_results()), batch_size=topic_batch_size, engine=topic_engine)
     step2 = add_entities(step1)
     step3 = add_keywords(step2)
 
     final = flatten_claims(step3)
 
-    with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-        json.dump(final, f, ensure_ascii=False, indent=2)
+    total = write_records(OUTPUT_FILE, final)
 
     print(f"\n🎉 Enrichment complete → {OUTPUT_FILE}")
-    print(f"📄 Total claims saved: {len(final)}")
+    print(f"📄 Total claims saved: {total}")
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Topic, entity and keyword enrichment of extracted claims")
+    parser.add_argument("command", nargs="?", choices=["run", "train-topic-head", "eval-topics"], default="run",
+                        help="run the enrichment / train the embedding topic head / compare embedding topics with XNLI")
+    parser.add_argument("--topic-engine", choices=["nli", "embedding"], default=TOPIC_ENGINE)
+    parser.add_argument("--topic-batch-size", type=int, default=TOPIC_BATCH_SIZE,
+                        help="claim x label NLI pairs per forward pass")
+    args = parser.parse_args()
+    if args.command == "run":
+        main(topic_batch_size=args.topic_batch_size, topic_engine=args.topic_engine)
+    else:
+        evaluate_topic_engine(train=args.command == "train-topic-head")
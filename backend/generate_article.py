@@ -5,7 +5,9 @@ from typing import List, Dict, Any, Optional
 import torch
 from sentence_transformers import SentenceTransformer
 from sklearn.cluster import AgglomerativeClustering
-from transformers import AutoTokenizer, AutoModelForCausalLM, BitsAndBytesConfig, pipeline
+
+from .services.llm_backend import load_causal_lm, make_pipeline
+from .services.early_stop import StopStats, first_sentence_done
 
 # -----------------------------
 # CONFIG
@@ -32,36 +34,9 @@ HEALTH_KEYWORDS = [
 # -----------------------------
 # MODEL LOAD (module-level)
 # -----------------------------
-print(f"[generate_article] [{datetime.now().strftime('%H:%M:%S')}] 🔄 Loading Qwen model ({MODEL_NAME})...")
-
-bnb_config = BitsAndBytesConfig(
-    load_in_4bit=True,
-    bnb_4bit_compute_dtype=torch.float16,
-    bnb_4bit_use_double_quant=True,
-)
-
-# load tokenizer & model
-tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME, trust_remote_code=True)
-model = AutoModelForCausalLM.from_pretrained(
-    MODEL_NAME,
-    device_map="auto",
-    quantization_config=bnb_config,
-    low_cpu_mem_usage=True,
-    offload_folder=OFFLOAD_DIR,
-    trust_remote_code=True,
-)
-model.eval()
-
-pipe = pipeline(
-    "text-generation",
-    model=model,
-    tokenizer=tokenizer,
-    torch_dtype=torch.float16,
-    trust_remote_code=True,
-    return_full_text=False,
-)
-
-print(f"[generate_article] [{datetime.now().strftime('%H:%M:%S')}] ✅ Model ready.")
+# 4-bit bitsandbytes on GPU, int8 dynamic quantization on CPU-only workers (LLM_BACKEND to override)
+tokenizer, model, BACKEND = load_causal_lm(MODEL_NAME, offload_dir=OFFLOAD_DIR, tag="generate_article")
+pipe = make_pipeline(tokenizer, model, BACKEND)
 
 # -----------------------------
 # EMBEDDING MODEL
@@ -98,13 +73,24 @@ def group_by_label(claims: List[str], labels: List[int]) -> Dict[int, List[str]]
 # -----------------------------
 # LLM wrapper
 # -----------------------------
-def llm(prompt: str, max_tokens: int = 400) -> str:
+# stop="sentence" ends decoding at the first "." (the one-sentence hook).
+# llm() runs concurrently from API requests: each call gets its own criteria,
+# only the counters are shared.
+STOP_CONDITIONS = {"sentence": first_sentence_done}
+early_stops = {name: StopStats(name) for name in STOP_CONDITIONS}
+
+
+def llm(prompt: str, max_tokens: int = 400, stop: Optional[str] = None) -> str:
+    kwargs = {}
+    if stop:
+        kwargs["stopping_criteria"] = early_stops[stop].criteria(tokenizer, STOP_CONDITIONS[stop], max_tokens)
     out = pipe(
         [{"role": "user", "content": prompt}],
         max_new_tokens=max_tokens,
         do_sample=False,
         temperature=0.1,
         repetition_penalty=1.05,
+        **kwargs,
     )
     return out[0].get("generated_text", "").strip()
 
@@ -428,7 +414,8 @@ YÊU CẦU:
 - Tự nhiên, rõ nghĩa.
 Bắt đầu viết:
 """
-    raw = llm(prompt, max_tokens=80)
+    # only the text up to the first "." is kept below, so decoding can stop there
+    raw = llm(prompt, max_tokens=80, stop="sentence")
     s = raw.replace("\n", " ").strip()
     s = s.strip().strip('"').strip("'").strip()
     if "." in s:
@@ -538,4 +525,5 @@ def build_full_outline(data: Dict[str, Any]) -> str:
     hook_src = summary if summary else " ".join(claims[:2])
     hook = generate_hook(hook_src, entities[0] if entities else "nhân vật")
 
+    print(f"[generate_article] {early_stops['sentence'].summary()}")
     return assemble_final_output(hook, middle)
@@ -6,6 +6,7 @@ from fastapi.middleware.cors import CORSMiddleware
 import gradio as gr
 from .db import Base, engine
 from .routers import crawl, rss_manager, users, system, generate_article, youtube_rss
+from .services.crawl_scheduler import scheduler as crawl_scheduler, SCHEDULER_ENABLED
 from fastapi.staticfiles import StaticFiles
 
 from chatbot.backend import SmartVideoNewsChatbot
@@ -51,6 +52,17 @@ app.include_router(generate_article.router, prefix="/api")
 app.include_router(rss_manager.router)
 app.include_router(youtube_rss.router)
 
+# Background per-feed crawler (set CRAWL_SCHEDULER=0 to rely on manual runs only).
+# Every uvicorn worker starts one; a lock file elects the single process that polls.
+@app.on_event("startup")
+def start_crawl_scheduler():
+    if SCHEDULER_ENABLED:
+        crawl_scheduler.start()
+
+@app.on_event("shutdown")
+def stop_crawl_scheduler():
+    crawl_scheduler.stop()
+
 # Initialize chatbot backend
 chatbot = SmartVideoNewsChatbot()
 
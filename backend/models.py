@@ -1,9 +1,12 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime
-from sqlalchemy.dialects.postgresql import JSON
+from sqlalchemy import Column, Integer, String, Text, DateTime, JSON, Index
 from .db import Base 
 
 class Article(Base):
     __tablename__ = "articles"
+    __table_args__ = (
+        Index("ix_articles_published_at", "published_at"),
+        Index("ix_articles_source", "source"),
+    )
     id = Column(Integer, primary_key=True, index=True)
     source = Column(String)
     title = Column(String)
@@ -20,9 +20,9 @@ ENRICH_SCRIPT      = os.path.join(BASE_DIR, "claims_enrich.py")
 SYNTHESIS_SCRIPT   = os.path.join(BASE_DIR, "synthesis_claims.py")
 SUGGESTED_MEDIA    = os.path.join(BASE_DIR, "suggested_media.py")
 
-CRAWLED_ARTICLES   = os.path.join(DATA_DIR, "crawled_articles.json")
+ARTICLE_STORE      = os.path.join(DATA_DIR, "articles")
 MEDIA_FILE         = os.path.join(DATA_DIR, "media_suggestions.json")
-SENTENCES_FILE     = os.path.join(DATA_DIR, "crawled_sentences.json")
+SENTENCES_FILE     = os.path.join(DATA_DIR, "crawled_sentences.jsonl")
 
 # Import crawler
 try:
@@ -31,6 +31,11 @@ except Exception as e:
     crawl_all_feeds = None
     _crawl_error = str(e)
 
+try:
+    from services.article_store import ArticleStore
+except ImportError:
+    from backend.services.article_store import ArticleStore
+
 
 # --------------------------------
 # Helpers
@@ -78,10 +83,9 @@ def generate_media_per_article(max_media=2):
     except Exception as e:
         return {"ok": False, "error": f"Cannot import suggested_media: {e}"}
 
-    articles = load_json(CRAWLED_ARTICLES, [])
     results = {}
 
-    for art in articles:
+    for art in ArticleStore(ARTICLE_STORE, read_only=True).iter_articles():
         aid = art.get("id")
         url = art.get("url")
         if not aid or not url:
@@ -161,10 +165,10 @@ def run_pipeline():
     log["finish"] = datetime.now().isoformat()
     log["groups"] = len(groups)
     log["output_files"] = {
-        "crawled_articles": CRAWLED_ARTICLES,
+        "crawled_articles": ARTICLE_STORE,
         "media": MEDIA_FILE,
         "sentences": SENTENCES_FILE,
-        "claims_enriched": os.path.join(DATA_DIR, "claims_enriched.json"),
+        "claims_enriched": os.path.join(DATA_DIR, "claims_enriched.jsonl"),
         "synthesis": grouped_file
     }
 
@@ -1,21 +1,37 @@
-from fastapi import APIRouter
-import feedparser, os, json, hashlib, re, requests
+from fastapi import APIRouter, HTTPException
+import feedparser, os, json, hashlib, time, threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout, as_completed
 from datetime import datetime
-from readability import Document
 from bs4 import BeautifulSoup
 from fastapi import BackgroundTasks
 from ..pipeline_universal import run_pipeline
+from ..services.fetch_engine import get_engine, Deadline, SOURCE_TIMEOUT, GLOBAL_TIMEOUT
+from ..services.article_store import get_store
+from ..services import article_db
+from ..services.page_extract import extract_page_async
+from ..services.author_extraction import extract_authors_from_entry
+from ..services.crawl_jobs import jobs
+from ..services import near_duplicate
+from ..services.file_lock import FileLock
 
 router = APIRouter(prefix="/crawler", tags=["Crawler"])
 
 BASE_DIR = os.path.dirname(__file__)
 DATA_DIR = os.path.join(BASE_DIR, "..", "data")
 RSS_FILE = os.path.join(DATA_DIR, "rss_sources.json")
-ARTICLES_FILE = os.path.join(DATA_DIR, "crawled_articles.json")
 LOG_FILE = os.path.join(DATA_DIR, "crawl_logs.json")
+FEED_STATE_FILE = os.path.join(DATA_DIR, "feed_state.json")  # per-feed HTTP validators
+CRAWL_LOCK_FILE = os.path.join(DATA_DIR, "crawl.lock")
 
 os.makedirs(DATA_DIR, exist_ok=True)
 DEBUG_AUTH = True
+FEED_WORKERS = 8  # feeds crawled in parallel; article pages share the fetch engine pool
+
+# Held for the whole crawl so manual runs and the scheduler never interleave
+# their feed_state.json / store writes: crawl_lock between threads of this
+# process, crawl_file_lock between uvicorn worker processes.
+crawl_lock = threading.Lock()
+crawl_file_lock = FileLock(CRAWL_LOCK_FILE)
 
 def load_json(path, default):
     if not os.path.exists(path):
@@ -43,7 +59,7 @@ def load_rss_sources():
 
 def fetch_url_html(url, timeout=10):
     try:
-        res = requests.get(url, timeout=timeout, headers={"User-Agent": "Mozilla/5.0"})
+        res = get_engine().get(url, timeout=timeout)
         res.raise_for_status()
         return res.text
     except Exception as e:
@@ -51,132 +67,30 @@ def fetch_url_html(url, timeout=10):
             print(f"⚠️ fetch_url_html failed for {url}: {e}")
         return None
 
-def is_likely_person(name: str) -> bool:
-    if not name:
-        return False
-    name = name.strip()
-    words = name.split()
-    if len(words) < 1 or len(words) > 5:
-        return False
-    if not all(re.match(r"^[A-ZĐÀ-Ỹ][a-zà-ỹ]+$", w) for w in words):
-        return False
-    if re.search(r"[\d:,%\-/]", name):
-        return False
-    return True
-
-def extract_authors_from_html(html: str):
-    if not html:
-        return []
-
-    soup = BeautifulSoup(html, "html.parser")
-    caption_keywords = re.compile(
-        r"(Ảnh|Minh họa|Hình|Nguồn|Mô phỏng|Video|Biểu đồ|Đồ họa|Trung tâm|Bệnh viện)",
-        re.IGNORECASE
-    )
-    doctor_prefix = re.compile(
-        r"(BS\.?|BSCKI|BSCKII|BSCK|ThS\.?|TS\.?|PGS\.?|GS\.?)",
-        re.IGNORECASE
-    )
-
-    # Step 1: Check bolded names first
-    for tag in soup.select("p strong, p b"):
-        text = tag.get_text(" ", strip=True)
-        if not text:
-            continue
-        text = re.split(r"\s*\(", text, 1)[0].strip()
-        if caption_keywords.search(text):
-            continue
-        if is_likely_person(text):
-            return [text]
-
-    # Step 2: Scan last few paragraphs for doctor-style lines
-    paragraphs = soup.find_all("p")
-    for p in reversed(paragraphs[-8:]):
-        text = p.get_text(" ", strip=True)
-        if not text or caption_keywords.search(text):
-            continue
-        if doctor_prefix.search(text):
-            m = re.search(
-                r'(?:BS\.?|BSCKI|BSCKII|ThS\.?|TS\.?|PGS\.?|GS\.?)\s*([A-ZĐ][a-zà-ỹ]+(?:\s+[A-ZĐ][a-zà-ỹ]+){0,4})',
-                text
-            )
-            if m:
-                name = m.group(1).strip()
-                if is_likely_person(name):
-                    return [name]
-            break  # stop after doctor line
-
-    # Step 3: "(Theo ...)" style at end
-    tail_text = " ".join(
-        p.get_text(" ", strip=True)
-        for p in paragraphs[-8:]
-        if not caption_keywords.search(p.get_text(" ", strip=True))
-    )
-    m = re.search(r'([A-ZĐ][a-zà-ỹ]+(?:\s+[A-ZĐ][a-zà-ỹ]+){0,4})\s*\(Theo', tail_text)
-    if m and is_likely_person(m.group(1).strip()):
-        return [m.group(1).strip()]
+# ---------------- Parse Article Entry ----------------
 
-    return []
+def entry_url(entry):
+    return entry.get("link", "") or entry.get("id", "") or entry.get("guid", "")
 
-def extract_authors_from_entry(entry):
-    names = []
-
-    if entry.get("authors"):
-        for a in entry.get("authors", []):
-            if isinstance(a, dict):
-                n = a.get("name") or a.get("email") or a.get("href")
-                if n: names.append(n)
-            elif isinstance(a, str):
-                names.append(a)
-    if not names and entry.get("author"):
-        names.append(entry["author"])
-    ad = entry.get("author_detail") or {}
-    if not names and isinstance(ad, dict) and ad.get("name"):
-        names.append(ad.get("name"))
-    if not names and entry.get("contributors"):
-        for c in entry.get("contributors", []):
-            if isinstance(c, dict) and c.get("name"):
-                names.append(c.get("name"))
-            elif isinstance(c, str):
-                names.append(c)
-    for key in ("dc_creator", "creator"):
-        if not names and entry.get(key) and isinstance(entry.get(key), str):
-            names.append(entry.get(key))
-
-    # normalize + dedupe
-    cleaned = []
-    for n in names:
-        if n:
-            n2 = re.sub(r"\s+", " ", n).strip()
-            if n2 and n2 not in cleaned:
-                cleaned.append(n2)
-
-    final_cleaned = []
-    for a in cleaned:
-        a = re.split(r"\s*\(", a, 1)[0].strip()
-        if is_likely_person(a) and a not in final_cleaned:
-            final_cleaned.append(a)
-    return final_cleaned
-
-# ---------------- Parse Article Entry ----------------
+def article_id(url):
+    return hashlib.md5((url or "").encode()).hexdigest()
 
 def parse_entry(entry, source_url):
-    url = entry.get("link", "") or entry.get("id", "") or entry.get("guid", "")
-    authors = extract_authors_from_entry(entry)
+    url = entry_url(entry)
+    feed_authors = extract_authors_from_entry(entry)
+    authors = feed_authors
 
     page_html = None
     content_text = ""
+    scraped_authors = []
 
     if not authors or not entry.get("content"):
         page_html = fetch_url_html(url)
         if page_html:
+            # readability + author heuristics run in the process pool on one parsed tree
+            content_text, scraped_authors = extract_page_async(page_html, want_authors=not authors or DEBUG_AUTH, url=url)
             if not authors:
-                authors = extract_authors_from_html(page_html)
-            try:
-                doc = Document(page_html)
-                content_text = BeautifulSoup(doc.summary(), "html.parser").get_text(separator="\n", strip=True)
-            except Exception:
-                content_text = ""
+                authors = scraped_authors
 
     if not content_text:
         if entry.get("summary"):
@@ -198,13 +112,13 @@ def parse_entry(entry, source_url):
     if DEBUG_AUTH:
         print("---- ENTRY DEBUG ----")
         print("title:", entry.get("title"))
-        print("feed-authors:", extract_authors_from_entry(entry))
-        print("scraped-authors:", extract_authors_from_html(page_html) if page_html else [])
+        print("feed-authors:", feed_authors)
+        print("scraped-authors:", scraped_authors)
         print("final-authors:", authors)
         print("---------------------")
 
     return {
-        "id": hashlib.md5((url or "").encode()).hexdigest(),
+        "id": article_id(url),
         "source": source_url,
         "url": url,
         "title": entry.get("title", "") or entry.get("headline", ""),
@@ -215,69 +129,285 @@ def parse_entry(entry, source_url):
 
 # ---------------- Crawl All Feeds ----------------
 
-def crawl_all_feeds():
-    sources = load_rss_sources()
+def conditional_headers(state):
+    headers = {}
+    if state.get("etag"):
+        headers["If-None-Match"] = state["etag"]
+    if state.get("last_modified"):
+        headers["If-Modified-Since"] = state["last_modified"]
+    return headers
+
+def not_modified_result(url, state, start):
+    state["not_modified_streak"] = state.get("not_modified_streak", 0) + 1
+    state["not_modified_total"] = state.get("not_modified_total", 0) + 1
+    print(f"💤 {url} not modified, skipped")
+    return [], {
+        "source": url,
+        "added": 0,
+        "failed": 0,
+        "status": "not_modified",
+        "not_modified": 1,
+        "not_modified_streak": state["not_modified_streak"],
+        "elapsed": round(time.monotonic() - start, 2)
+    }
+
+def crawl_source(url, engine, timeout=SOURCE_TIMEOUT, state=None, known_ids=frozenset(), run_deadline=None):
+    """Fetch one feed and its article pages through the shared engine.
+    The `timeout` (s) budget starts when the feed starts running, not when it is
+    queued, and is capped by what is left of `run_deadline`.
+    `state` holds this feed's validators (etag, last_modified, content_hash) and is
+    updated in place. Entries whose URL hash is in `known_ids` are skipped before any
+    page fetch. Returns (articles, result) where result is the per-source run-log entry."""
+    start = time.monotonic()
+    deadline = Deadline(min(timeout, run_deadline.remaining()) if run_deadline else timeout)
+    articles, failed, timed_out, skipped_known = [], 0, 0, 0
+    state = state if state is not None else {}
+
+    print(f"🔍 Crawling {url}...")
+    try:
+        res = engine.get(url, headers=conditional_headers(state))
+        if res.status_code == 304:
+            return not_modified_result(url, state, start)
+        res.raise_for_status()
+
+        # Some servers ignore validators; an identical body is just as good as a 304
+        content_hash = hashlib.md5(res.content).hexdigest()
+        state["etag"] = res.headers.get("ETag") or state.get("etag")
+        state["last_modified"] = res.headers.get("Last-Modified") or state.get("last_modified")
+        if content_hash == state.get("content_hash"):
+            return not_modified_result(url, state, start)
+        state["content_hash"] = content_hash
+        state["not_modified_streak"] = 0
+
+        feed = feedparser.parse(res.content)
+    except Exception as e:
+        print(f"⚠️ Failed fetching feed {url}: {e}")
+        return articles, {
+            "source": url,
+            "added": 0,
+            "failed": 1,
+            "status": "error",
+            "elapsed": round(time.monotonic() - start, 2)
+        }
+
+    futures, seen = [], set()
+    for entry in feed.entries:
+        link = entry_url(entry)
+        if not link:
+            continue
+        aid = article_id(link)
+        if aid in known_ids or aid in seen:
+            skipped_known += 1
+            continue
+        seen.add(aid)
+        futures.append(engine.submit(parse_entry, entry, url))
+
+    for fut in futures:
+        try:
+            articles.append(fut.result(timeout=deadline.remaining()))
+        except FutureTimeout:
+            fut.cancel()
+            timed_out += 1
+        except Exception as e:
+            print(f"⚠️ Failed parsing entry: {e}")
+            failed += 1
+
+    if timed_out:
+        # Entries were left unread: force a full fetch next time instead of a 304
+        for key in ("etag", "last_modified", "content_hash"):
+            state.pop(key, None)
+
+    # "added" and "status" are filled in by crawl_all_feeds after de-duplication
+    result = {
+        "source": url,
+        "added": 0,
+        "failed": failed + timed_out,
+        "skipped_known": skipped_known,
+        "not_modified": 0,
+        "elapsed": round(time.monotonic() - start, 2)
+    }
+    if timed_out:
+        result["timed_out"] = timed_out
+    return articles, result
+
+
+def crawl_all_feeds(sources=None, trigger="manual", blocking=True, progress=None):
+    """Crawl `sources` (default: every feed in rss_sources.json).
+    `progress(event, data)` is called with ("start", None) once the lock is held and
+    ("source", result) as each feed finishes.
+    Returns the run log, or None when blocking=False and another crawl is running."""
+    if not crawl_lock.acquire(blocking=blocking):
+        return None
+    try:
+        if not crawl_file_lock.acquire(blocking=blocking):
+            return None
+        try:
+            return _crawl_feeds(sources, trigger, progress or (lambda event, data=None: None))
+        finally:
+            crawl_file_lock.release()
+    finally:
+        crawl_lock.release()
+
+
+def _crawl_feeds(sources, trigger, progress):
+    sources = sources or load_rss_sources()
     if not sources:
         raise ValueError("No RSS sources found in rss_sources.json")
+    progress("start")
 
-    existing_articles = load_json(ARTICLES_FILE, [])
+    store = get_store()
     logs = load_json(LOG_FILE, [])
-    existing_ids = {a["id"] for a in existing_articles}
+    feed_state = load_json(FEED_STATE_FILE, {})
+    existing_ids = store.ids()
+    new_articles = []
 
     run_log = {
         "time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "trigger": trigger,
         "results": [],
-        "total_new": 0
+        "total_new": 0,
+        "total_skipped_known": 0,
+        "total_near_duplicates": 0,
+        "total_not_modified": 0
     }
-
+    near_dups = near_duplicate.get_index(store)
+    existing_ids |= near_dups.dropped_ids()   # dropped near-duplicates are not fetched again
+
+    engine = get_engine()
+    known_ids = frozenset(existing_ids)  # read-only snapshot shared by the feed threads
+    run_deadline = Deadline(GLOBAL_TIMEOUT)
+    started = time.monotonic()
+
+    # Feeds run on their own small pool: each feed task blocks on its article
+    # futures, so it must not share the engine pool or it could starve it.
+    feed_pool = ThreadPoolExecutor(max_workers=FEED_WORKERS, thread_name_prefix="feed")
+    futures, prior_states = {}, {}
     for url in sources:
-        print(f"🔍 Crawling {url}...")
-        feed = feedparser.parse(url)
-        added, failed = 0, 0
-
-        for entry in feed.entries:
-            try:
-                article = parse_entry(entry, url)
-                if not article["url"] or article["id"] in existing_ids:
+        state = feed_state.setdefault(url, {})
+        prior_states[url] = dict(state)
+        futures[url] = feed_pool.submit(crawl_source, url, engine, SOURCE_TIMEOUT, state, known_ids, run_deadline)
+
+    results, kept = {}, {}
+    fingerprints = {}   # new articles' simhashes, indexed only once store.append succeeds
+    dropped = {}        # near-duplicates left out under NEAR_DUP_ACTION=drop, recorded likewise
+
+    def merge(url, articles, result):
+        # De-duplicate against the store and feeds merged earlier in this run
+        added, near = [], 0
+        for article in articles:
+            if not article["url"] or article["id"] in existing_ids:
+                continue
+            existing_ids.add(article["id"])
+            match = near_dups.check(article, fingerprints)
+            if match:
+                near += 1
+                if near_duplicate.NEAR_DUP_ACTION == "drop":
+                    dropped[article["id"]] = match[0]
                     continue
-                existing_ids.add(article["id"])
-                existing_articles.append(article)
-                added += 1
+                article["near_duplicate_of"], article["near_duplicate_similarity"] = match
+            added.append(article)
+        kept[url] = added
+        result["added"] = len(added)
+        result["near_duplicates"] = near
+        result.setdefault("status", "success" if added else ("warning" if result["failed"] > 0 else "empty"))
+        results[url] = result
+        progress("source", result)
+        print(f"✅ {len(added)} new articles added from {url} ({result.get('elapsed', '?')}s)")
+
+    # Merge feeds as they finish so progress is visible while slower feeds still run
+    by_future = {fut: url for url, fut in futures.items()}
+    try:
+        for fut in as_completed(by_future, timeout=run_deadline.remaining()):
+            url = by_future[fut]
+            try:
+                articles, result = fut.result()
             except Exception as e:
-                print(f"⚠️ Failed parsing entry: {e}")
-                failed += 1
-
-        run_log["results"].append({
-            "source": url,
-            "added": added,
-            "failed": failed,
-            "status": "success" if added > 0 else ("warning" if failed > 0 else "empty")
-        })
-        run_log["total_new"] += added
-
-        print(f"✅ {added} new articles added from {url}")
+                print(f"⚠️ Failed crawling {url}: {e}")
+                feed_state[url] = prior_states[url]
+                articles, result = [], {"source": url, "added": 0, "failed": 1, "status": "error",
+                                        "elapsed": round(time.monotonic() - started, 2)}
+            merge(url, articles, result)
+    except FutureTimeout:
+        pass
+    feed_pool.shutdown(wait=False, cancel_futures=True)
 
-    save_json(ARTICLES_FILE, existing_articles)
-    logs.insert(0, run_log)
-    save_json(LOG_FILE, logs[:100])
-
-    print(f"💾 Total stored: {len(existing_articles)} articles")
+    for url in sources:
+        if url not in results:
+            futures[url].cancel()
+            feed_state[url] = prior_states[url]  # nothing was stored, keep the old validators
+            results[url] = {"source": url, "added": 0, "failed": 0, "status": "timeout"}
+            progress("source", results[url])
+            print(f"⏱️ {url} did not finish before the crawl deadline")
+
+    # Store and log in rss_sources.json order so the corpus stays deterministic
+    for url in sources:
+        result = results[url]
+        new_articles.extend(kept.get(url, []))
+        run_log["results"].append(result)
+        run_log["total_new"] += result["added"]
+        run_log["total_skipped_known"] += result.get("skipped_known", 0)
+        run_log["total_near_duplicates"] += result.get("near_duplicates", 0)
+        run_log["total_not_modified"] += result.get("not_modified", 0)
+
+    run_log["elapsed"] = round(time.monotonic() - started, 2)
+
+    store.append(new_articles)
+    near_dups.commit(fingerprints, dropped)
+    near_dups.save()
+    if article_db.ARTICLE_DB_ENABLED and new_articles:
+        try:
+            run_log["db_inserted"] = article_db.bulk_upsert(new_articles)
+        except Exception as e:
+            print(f"⚠️ Article DB upsert failed: {e}")
+            run_log["db_error"] = str(e)
+    save_json(FEED_STATE_FILE, feed_state)
+
+    # Scheduled polls that found nothing would push real runs out of the 100-entry log
+    eventful = run_log["total_new"] or any(r.get("failed") or r.get("status") == "timeout" for r in run_log["results"])
+    if trigger == "manual" or eventful:
+        logs.insert(0, run_log)
+        save_json(LOG_FILE, logs[:100])
+
+    print(f"💾 Total stored: {len(store)} articles")
     return run_log
 
 
 @router.post("/run")
 def run_crawler():
+    """Start a crawl job and return immediately; poll /crawler/jobs/{job_id} for progress."""
     try:
-        result = crawl_all_feeds()
+        sources = load_rss_sources()
+        if not sources:
+            raise ValueError("No RSS sources found in rss_sources.json")
+        job, created = jobs.start(crawl_all_feeds, sources)
+        if not created:
+            return {
+                "success": False,
+                "error": "Một lượt crawl khác đang chạy.",
+                "job_id": job["job_id"],
+                "status": job["status"]
+            }
         return {
             "success": True,
-            "message": f"Crawl completed successfully! {result.get('total_new', 0)} bài viết mới được thêm.",
-            "log": result
+            "message": "Crawl started.",
+            "job_id": job["job_id"],
+            "status": job["status"]
         }
     except Exception as e:
         print(f"❌ [DEBUG] Exception during crawl:\n{e}")
         return {"success": False, "error": str(e)}
 
+@router.get("/jobs")
+def list_jobs():
+    return {"jobs": jobs.recent()}
+
+@router.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
 @router.get("/logs")
 def get_logs():
     logs = load_json(LOG_FILE, [])
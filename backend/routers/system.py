@@ -1,12 +1,10 @@
 from fastapi import APIRouter
 import psutil
 import shutil
-import os, json
 from datetime import date
+from ..services.article_store import get_store
 
 router = APIRouter(prefix="/system", tags=["System"])
-BASE_DIR = os.path.dirname(__file__)
-DATA_PATH = os.path.join(BASE_DIR, "..", "data", "crawled_articles.json")
 
 @router.get("/status")
 def get_system_status():
@@ -33,17 +31,12 @@ def get_system_status():
 
 @router.get("/total")
 def get_total_articles():
-    """Return total number of crawled articles"""
-    if not os.path.exists(DATA_PATH):
-        return {"total": 0, "today": 0}
-
-    with open(DATA_PATH, "r", encoding="utf-8") as f:
-        data = json.load(f)
-
-    total = len(data)
+    """Return total number of crawled articles (read from the store index only)"""
+    store = get_store()
+    total = len(store)
 
     # count today
     today_str = date.today().isoformat()
-    today_count = sum(1 for item in data if item.get("date", "").startswith(today_str))
+    today_count = sum(1 for d in store.dates() if d.startswith(today_str))
 
     return {"total": total, "today": today_count}
\ No newline at end of file
@@ -0,0 +1,161 @@
+import os
+import hashlib
+import argparse
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from ..db import engine as default_engine
+from ..models import Article
+from .article_store import ArticleStore
+
+# ---------------- Config ----------------
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "data")
+SQLITE_FALLBACK_URL = "sqlite:///" + os.path.abspath(os.path.join(DATA_DIR, "articles.db"))
+ARTICLE_DB_ENABLED = os.getenv("ARTICLE_DB", "1") != "0"
+UPSERT_CHUNK = 100  # 7 columns per row stays under SQLite's 999 bound-parameter limit
+BACKFILL_BATCH = 1000  # articles per transaction when syncing the whole store
+
+_engine = None
+
+
+def get_article_engine():
+    """Postgres engine from db.py when reachable, otherwise a local SQLite file."""
+    global _engine
+    if _engine is not None:
+        return _engine
+    try:
+        with default_engine.connect():
+            pass
+        _engine = default_engine
+    except Exception as e:
+        print(f"⚠️ Article DB unavailable ({e.__class__.__name__}), falling back to SQLite")
+        _engine = create_engine(SQLITE_FALLBACK_URL)
+    ensure_schema(_engine)
+    return _engine
+
+
+def ensure_schema(engine):
+    # create_all skips existing tables, so indexes added later are created explicitly
+    Article.__table__.create(engine, checkfirst=True)
+    for idx in Article.__table__.indexes:
+        idx.create(engine, checkfirst=True)
+
+
+def parse_published(value):
+    """Feed dates are RFC 822 ("Sun, 02 Nov 2025 08:50:55 +0700") or ISO; store naive UTC."""
+    if not value:
+        return None
+    try:
+        dt = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        try:
+            dt = datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt
+
+
+def to_row(article):
+    return {
+        "source": article.get("source"),
+        "title": article.get("title"),
+        "url": article.get("url"),
+        "published_at": parse_published(article.get("date")),
+        "content": article.get("content"),
+        "authors": article.get("authors") or [],
+        "images": article.get("images") or [],
+    }
+
+
+def bulk_upsert(articles, engine=None):
+    """INSERT ... ON CONFLICT (url) DO NOTHING for a crawl batch. Returns rows inserted."""
+    engine = engine or get_article_engine()
+    rows = [to_row(a) for a in articles if a.get("url")]
+    if not rows:
+        return 0
+
+    insert = pg_insert if engine.dialect.name == "postgresql" else sqlite_insert
+    inserted = 0
+    with engine.begin() as conn:
+        for i in range(0, len(rows), UPSERT_CHUNK):
+            stmt = insert(Article).values(rows[i:i + UPSERT_CHUNK])
+            stmt = stmt.on_conflict_do_nothing(index_elements=["url"])
+            inserted += conn.execute(stmt).rowcount or 0
+    return inserted
+
+
+def backfill(articles, engine=None, batch_size=BACKFILL_BATCH):
+    """
+    Upsert every article of an iterable (e.g. ArticleStore.iter_articles()), batch by
+    batch. Crawls only upsert what is new to them, so this brings in the corpus crawled
+    before the DB existed and anything a failed upsert missed. Returns (seen, inserted).
+    """
+    engine = engine or get_article_engine()
+    seen = inserted = 0
+    batch = []
+    for article in articles:
+        batch.append(article)
+        if len(batch) >= batch_size:
+            seen += len(batch)
+            inserted += bulk_upsert(batch, engine)
+            batch = []
+    seen += len(batch)
+    inserted += bulk_upsert(batch, engine)
+    return seen, inserted
+
+
+def _row_dict(row):
+    return {
+        "id": hashlib.md5((row.url or "").encode()).hexdigest(),  # same ID the crawler/JSON stages use
+        "db_id": row.id,
+        "source": row.source,
+        "url": row.url,
+        "title": row.title,
+        "authors": row.authors or [],
+        "published_at": row.published_at.isoformat() if row.published_at else None,
+        "content": row.content,
+    }
+
+
+def articles_since(watermark=0, limit=None, engine=None):
+    """
+    Rows inserted after `watermark` (the last Article.id a stage has processed).
+    Returns (articles, new_watermark) so a downstream stage can persist its position.
+    """
+    engine = engine or get_article_engine()
+    stmt = select(Article).where(Article.id > watermark).order_by(Article.id)
+    if limit:
+        stmt = stmt.limit(limit)
+    with engine.connect() as conn:
+        rows = conn.execute(stmt).all()
+    articles = [_row_dict(r) for r in rows]
+    return articles, (rows[-1].id if rows else watermark)
+
+
+def articles_published_since(since, source=None, engine=None):
+    """Articles with published_at >= `since` (uses ix_articles_published_at / ix_articles_source)."""
+    engine = engine or get_article_engine()
+    stmt = select(Article).where(Article.published_at >= since)
+    if source:
+        stmt = stmt.where(Article.source == source)
+    stmt = stmt.order_by(Article.published_at)
+    with engine.connect() as conn:
+        return [_row_dict(r) for r in conn.execute(stmt).all()]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Article DB maintenance")
+    parser.add_argument("command", choices=["backfill"],
+                        help="upsert every article in the article store (safe to re-run)")
+    args = parser.parse_args()
+
+    store = ArticleStore(read_only=True)
+    print(f"📂 Syncing {len(store)} stored articles into the article DB")
+    seen, inserted = backfill(store.iter_articles())
+    print(f"✅ {inserted} inserted, {seen - inserted} already present")
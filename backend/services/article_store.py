@@ -0,0 +1,253 @@
+import os
+import json
+import threading
+
+from .file_lock import FileLock
+
+# ---------------- Paths / Config ----------------
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "data")
+STORE_DIR = os.path.join(DATA_DIR, "articles")
+LEGACY_FILE = os.path.join(DATA_DIR, "crawled_articles.json")
+
+MANIFEST_NAME = "manifest.json"   # ordered list of segments, last one is active
+INDEX_NAME = "index.tsv"          # one "id<TAB>segment<TAB>date" line per article
+LOCK_NAME = "writer.lock"         # held by whichever process is repairing / appending
+SEGMENT_MAX_BYTES = 8 * 1024 * 1024
+
+
+def _segment_name(n):
+    return f"segment-{n:06d}.jsonl"
+
+
+def _clean_field(value):
+    return str(value or "").replace("\t", " ").replace("\n", " ")
+
+
+class ArticleStore:
+    """
+    Append-only article store.
+
+    Articles are written as JSON lines to numbered segments; a segment is sealed
+    once it grows past SEGMENT_MAX_BYTES and a new one is started by atomically
+    replacing the manifest. A compact TSV index (id, segment, date) lets callers
+    check membership and count articles without reading the segments.
+
+    Writers (get_store()) repair and append under an OS file lock, so several
+    processes can share one store. read_only=True opens it for streaming only:
+    no repair, no writes, and an incomplete last line (an append in progress
+    elsewhere) is simply skipped.
+    """
+
+    def __init__(self, root=STORE_DIR, legacy_file=LEGACY_FILE, segment_max_bytes=SEGMENT_MAX_BYTES,
+                 read_only=False):
+        self.root = root
+        self.segment_max_bytes = segment_max_bytes
+        self.read_only = read_only
+        self._lock = threading.Lock()
+
+        self.manifest_path = os.path.join(root, MANIFEST_NAME)
+        self.index_path = os.path.join(root, INDEX_NAME)
+        self._file_lock = FileLock(os.path.join(root, LOCK_NAME))
+        self._index = {}  # id -> (segment, date)
+        self._index_offset = 0
+
+        if read_only and os.path.exists(self.manifest_path):
+            self.segments = self._read_manifest()
+            self._load_index()
+            return
+
+        # writer, or the very first open of a store (which also imports the legacy file)
+        os.makedirs(root, exist_ok=True)
+        with self._file_lock:
+            first_open = not os.path.exists(self.manifest_path)
+            if first_open:
+                self._write_manifest([_segment_name(1)])
+            self.segments = self._read_manifest()
+            self._load_index()
+            self._repair_active_segment()
+
+            if first_open and legacy_file and os.path.exists(legacy_file):
+                self._migrate_legacy(legacy_file)
+
+    # ---------------- Manifest ----------------
+
+    def _read_manifest(self):
+        with open(self.manifest_path, "r", encoding="utf-8") as f:
+            return json.load(f)["segments"]
+
+    def _write_manifest(self, segments):
+        tmp = self.manifest_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"segments": segments}, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.manifest_path)
+
+    @property
+    def active_segment(self):
+        return self.segments[-1]
+
+    def _segment_path(self, name):
+        return os.path.join(self.root, name)
+
+    # ---------------- Index ----------------
+
+    def _load_index(self):
+        """Read index lines added since the last call (complete lines only)."""
+        if not os.path.exists(self.index_path):
+            return
+        with open(self.index_path, "rb") as f:
+            f.seek(self._index_offset)
+            data = f.read()
+        end = data.rfind(b"\n") + 1
+        self._index_offset += end
+        for line in data[:end].decode("utf-8").splitlines():
+            parts = line.split("\t")
+            if len(parts) == 3 and parts[0]:
+                self._index[parts[0]] = (parts[1], parts[2])
+
+    def _refresh(self):
+        """Pick up segments / index lines written by other processes."""
+        self.segments = self._read_manifest()
+        self._load_index()
+
+    def _repair_active_segment(self):
+        """Drop a torn trailing line and re-index records written before a crash
+        could append their index lines. Only the active segment can be affected."""
+        path = self._segment_path(self.active_segment)
+        if not os.path.exists(path):
+            return
+
+        with open(path, "rb") as f:
+            data = f.read()
+        if data and not data.endswith(b"\n"):
+            cut = data.rfind(b"\n") + 1
+            with open(path, "r+b") as f:
+                f.truncate(cut)
+            data = data[:cut]
+
+        missing = []
+        for line in data.splitlines():
+            try:
+                art = json.loads(line)
+            except ValueError:
+                continue
+            if art.get("id") and art["id"] not in self._index:
+                missing.append(art)
+        if missing:
+            self._append_index(missing, self.active_segment)
+
+    def _append_index(self, articles, segment):
+        lines = []
+        for art in articles:
+            date = _clean_field(art.get("date"))
+            self._index[art["id"]] = (segment, date)
+            lines.append(f"{art['id']}\t{segment}\t{date}\n")
+        with open(self.index_path, "a", encoding="utf-8") as f:
+            f.writelines(lines)
+            f.flush()
+            os.fsync(f.fileno())
+            self._index_offset = f.tell()
+
+    # ---------------- Public API ----------------
+
+    def __len__(self):
+        with self._lock:
+            self._load_index()
+            return len(self._index)
+
+    def __contains__(self, article_id):
+        return article_id in self._index
+
+    def ids(self):
+        with self._lock:
+            self._load_index()
+            return set(self._index)
+
+    def dates(self):
+        """Stored article dates straight from the index (a snapshot, including other processes' appends)."""
+        with self._lock:
+            self._load_index()
+            return [date for _, date in self._index.values()]
+
+    def append(self, articles):
+        """Append new articles (unknown IDs only). Returns the number written."""
+        if self.read_only:
+            raise RuntimeError("ArticleStore opened read_only")
+        with self._lock, self._file_lock:
+            self._refresh()
+            return self._append(articles)
+
+    def _append(self, articles):
+        fresh, seen = [], set()
+        for art in articles:
+            aid = art.get("id")
+            if not aid or aid in self._index or aid in seen:
+                continue
+            seen.add(aid)
+            fresh.append(art)
+        if not fresh:
+            return 0
+
+        path = self._segment_path(self.active_segment)
+        with open(path, "a", encoding="utf-8") as f:
+            for art in fresh:
+                f.write(json.dumps(art, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self._append_index(fresh, self.active_segment)
+
+        if os.path.getsize(path) >= self.segment_max_bytes:
+            self._rollover()
+        return len(fresh)
+
+    def _rollover(self):
+        next_name = _segment_name(len(self.segments) + 1)
+        open(self._segment_path(next_name), "a", encoding="utf-8").close()
+        self._write_manifest(self.segments + [next_name])
+        self.segments = self.segments + [next_name]
+
+    def iter_articles(self):
+        """Stream every stored article in insertion order."""
+        for name in list(self.segments):
+            path = self._segment_path(name)
+            if not os.path.exists(path):
+                continue
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if not line.endswith("\n"):
+                        break   # incomplete last line: an append in progress, or torn (the writer repairs it)
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        continue
+
+    # ---------------- Migration ----------------
+
+    def _migrate_legacy(self, legacy_file):
+        try:
+            with open(legacy_file, "r", encoding="utf-8") as f:
+                legacy = json.load(f)
+        except (OSError, ValueError):
+            return
+        legacy = [a for a in legacy if isinstance(a, dict)]
+        added = 0
+        for i in range(0, len(legacy), 200):  # small batches so rollover keeps segments near the size cap
+            added += self._append(legacy[i:i + 200])
+        print(f"📦 Migrated {added} articles from {os.path.basename(legacy_file)} into {self.root}")
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """Process-wide store so the in-memory index is loaded once."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ArticleStore()
+        return _store
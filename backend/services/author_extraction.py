@@ -0,0 +1,175 @@
+import re
+from functools import lru_cache
+from urllib.parse import urlparse
+
+from lxml import etree
+
+# ---------------- Patterns (compiled once at import) ----------------
+PERSON_WORD_RE = re.compile(r"^[A-ZĐÀ-Ỹ][a-zà-ỹ]+$")
+PERSON_BAD_CHARS_RE = re.compile(r"[\d:,%\-/]")
+PAREN_SPLIT_RE = re.compile(r"\s*\(")
+WHITESPACE_RE = re.compile(r"\s+")
+CAPTION_RE = re.compile(
+    r"(Ảnh|Minh họa|Hình|Nguồn|Mô phỏng|Video|Biểu đồ|Đồ họa|Trung tâm|Bệnh viện)",
+    re.IGNORECASE
+)
+DOCTOR_PREFIX_RE = re.compile(
+    r"(BS\.?|BSCKI|BSCKII|BSCK|ThS\.?|TS\.?|PGS\.?|GS\.?)",
+    re.IGNORECASE
+)
+DOCTOR_NAME_RE = re.compile(
+    r'(?:BS\.?|BSCKI|BSCKII|ThS\.?|TS\.?|PGS\.?|GS\.?)\s*([A-ZĐ][a-zà-ỹ]+(?:\s+[A-ZĐ][a-zà-ỹ]+){0,4})'
+)
+THEO_RE = re.compile(r'([A-ZĐ][a-zà-ỹ]+(?:\s+[A-ZĐ][a-zà-ỹ]+){0,4})\s*\(Theo')
+
+BOLD_XPATH = etree.XPath("//p//strong | //p//b")
+PARAGRAPH_XPATH = etree.XPath("//p")
+
+SKIP_TEXT_TAGS = {"script", "style", "template", "noscript"}
+TAIL_PARAGRAPHS = 8
+
+# Byline selectors tried before the generic heuristics, keyed by domain.
+DOMAIN_RULES = {
+    "vnexpress.net": [
+        "//p[contains(@class, 'author_mail')]//strong",
+        "//p[@class='Normal' and contains(@style, 'right')]/strong",
+    ],
+    "tuoitre.vn": [
+        "//div[contains(@class, 'author-info')]//a[contains(@class, 'name')]",
+    ],
+    "thanhnien.vn": [
+        "//div[contains(@class, 'author-info')]//a[contains(@class, 'name')]",
+    ],
+}
+
+
+# ---------------- Helpers ----------------
+
+def is_likely_person(name: str) -> bool:
+    if not name:
+        return False
+    name = name.strip()
+    words = name.split()
+    if len(words) < 1 or len(words) > 5:
+        return False
+    if not all(PERSON_WORD_RE.match(w) for w in words):
+        return False
+    if PERSON_BAD_CHARS_RE.search(name):
+        return False
+    return True
+
+def _collect_text(el, parts):
+    if isinstance(el.tag, str) and el.tag not in SKIP_TEXT_TAGS and el.text:
+        parts.append(el.text)
+    for child in el:
+        _collect_text(child, parts)
+        if child.tail:
+            parts.append(child.tail)
+
+def node_text(el, sep=" "):
+    """Equivalent of BeautifulSoup's get_text(sep, strip=True) for an lxml element."""
+    parts = []
+    _collect_text(el, parts)
+    return sep.join(s for s in (p.strip() for p in parts) if s)
+
+def _domain(url):
+    host = urlparse(url or "").netloc.lower()
+    return host[4:] if host.startswith("www.") else host
+
+@lru_cache(maxsize=256)
+def domain_rules(domain):
+    """Compiled byline XPaths for a domain (subdomains inherit the parent's rules)."""
+    for known, selectors in DOMAIN_RULES.items():
+        if domain == known or domain.endswith("." + known):
+            return tuple(etree.XPath(sel) for sel in selectors)
+    return ()
+
+
+# ---------------- Extractors ----------------
+
+class AuthorExtractor:
+    """Author heuristics over an already parsed lxml tree (nothing is re-parsed here)."""
+
+    def from_tree(self, tree, url=None):
+        for rule in domain_rules(_domain(url)):
+            for el in rule(tree):
+                name = PAREN_SPLIT_RE.split(node_text(el), 1)[0].strip()
+                if is_likely_person(name):
+                    return [name]
+
+        return self._bold_names(tree) or self._tail_names(tree)
+
+    def _bold_names(self, tree):
+        # Step 1: Check bolded names first
+        for tag in BOLD_XPATH(tree):
+            text = node_text(tag)
+            if not text:
+                continue
+            text = PAREN_SPLIT_RE.split(text, 1)[0].strip()
+            if CAPTION_RE.search(text):
+                continue
+            if is_likely_person(text):
+                return [text]
+        return []
+
+    def _tail_names(self, tree):
+        tail = [node_text(p) for p in PARAGRAPH_XPATH(tree)[-TAIL_PARAGRAPHS:]]
+
+        # Step 2: Scan last few paragraphs for doctor-style lines
+        for text in reversed(tail):
+            if not text or CAPTION_RE.search(text):
+                continue
+            if DOCTOR_PREFIX_RE.search(text):
+                m = DOCTOR_NAME_RE.search(text)
+                if m:
+                    name = m.group(1).strip()
+                    if is_likely_person(name):
+                        return [name]
+                break  # stop after doctor line
+
+        # Step 3: "(Theo ...)" style at end
+        tail_text = " ".join(t for t in tail if not CAPTION_RE.search(t))
+        m = THEO_RE.search(tail_text)
+        if m and is_likely_person(m.group(1).strip()):
+            return [m.group(1).strip()]
+
+        return []
+
+    def from_entry(self, entry):
+        names = []
+
+        if entry.get("authors"):
+            for a in entry.get("authors", []):
+                if isinstance(a, dict):
+                    n = a.get("name") or a.get("email") or a.get("href")
+                    if n: names.append(n)
+                elif isinstance(a, str):
+                    names.append(a)
+        if not names and entry.get("author"):
+            names.append(entry["author"])
+        ad = entry.get("author_detail") or {}
+        if not names and isinstance(ad, dict) and ad.get("name"):
+            names.append(ad.get("name"))
+        if not names and entry.get("contributors"):
+            for c in entry.get("contributors", []):
+                if isinstance(c, dict) and c.get("name"):
+                    names.append(c.get("name"))
+                elif isinstance(c, str):
+                    names.append(c)
+        for key in ("dc_creator", "creator"):
+            if not names and entry.get(key) and isinstance(entry.get(key), str):
+                names.append(entry.get(key))
+
+        # normalize + dedupe
+        final_cleaned = []
+        for n in names:
+            if not n:
+                continue
+            a = PAREN_SPLIT_RE.split(WHITESPACE_RE.sub(" ", n).strip(), 1)[0].strip()
+            if is_likely_person(a) and a not in final_cleaned:
+                final_cleaned.append(a)
+        return final_cleaned
+
+
+extractor = AuthorExtractor()
+extract_authors_from_entry = extractor.from_entry
@@ -0,0 +1,164 @@
+import os
+import json
+import time
+import uuid
+import threading
+from datetime import datetime
+
+from .file_lock import FileLock
+from .fetch_engine import GLOBAL_TIMEOUT
+
+# ---------------- Config ----------------
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "data")
+JOBS_FILE = os.path.join(DATA_DIR, "crawl_jobs.json")
+
+MAX_JOBS = 20  # finished jobs kept for status polling
+# A queued job can wait for a running crawl, then run itself; a job silent for longer
+# than that belonged to a worker that died and no longer blocks new runs.
+STALE_SECONDS = 2 * GLOBAL_TIMEOUT + 60
+
+
+class CrawlJob:
+    """Progress of one crawl run, updated from the crawl thread and published via the registry."""
+
+    def __init__(self, sources, publish):
+        self.id = uuid.uuid4().hex[:12]
+        self.status = "queued"
+        self.created = datetime.now().isoformat(timespec="seconds")
+        self.sources = list(sources)
+        self.feeds = {url: {"status": "pending"} for url in self.sources}
+        self.articles_added = 0
+        self.result = None
+        self.error = None
+        self._started = None
+        self._finished = None
+        self._publish = publish
+        self._lock = threading.Lock()
+
+    # called by crawl_all_feeds
+    def progress(self, event, data=None):
+        with self._lock:
+            if event == "start":
+                self.status = "running"
+                self._started = time.time()
+            elif event == "source":
+                self.feeds[data["source"]] = {
+                    "status": data.get("status"),
+                    "added": data.get("added", 0),
+                    "failed": data.get("failed", 0),
+                    "elapsed": data.get("elapsed"),
+                }
+                self.articles_added += data.get("added", 0)
+            record = self._record()
+        self._publish(record)
+
+    def finish(self, result=None, error=None):
+        with self._lock:
+            self.result = result
+            self.error = error
+            self.status = "failed" if error else "done"
+            self._finished = time.time()
+            record = self._record()
+        self._publish(record)
+
+    def to_dict(self):
+        with self._lock:
+            return job_view(self._record())
+
+    def _record(self):
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "created": self.created,
+            "started_at": self._started,
+            "finished_at": self._finished,
+            "updated_at": time.time(),
+            "feeds_total": len(self.sources),
+            "feeds_done": sum(1 for f in self.feeds.values() if f["status"] != "pending"),
+            "articles_added": self.articles_added,
+            "feeds": dict(self.feeds),
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+def job_view(record, now=None):
+    """Status endpoint view of a stored job record."""
+    now = now or time.time()
+    view = dict(record)
+    started, finished = view.pop("started_at", None), view.pop("finished_at", None)
+    updated = view.pop("updated_at", None)
+    view["elapsed"] = round((finished or now) - started, 2) if started else 0
+    if view["status"] in ("queued", "running") and updated and now - updated > STALE_SECONDS:
+        view["status"] = "failed"
+        view["error"] = view["error"] or "The worker running this crawl stopped reporting progress."
+    return view
+
+
+class JobRegistry:
+    """
+    Crawl jobs shared by every uvicorn worker process: each job is published to
+    JOBS_FILE (under a FileLock) whenever it changes, so a status poll can land on
+    any worker. Jobs run in the process that started them.
+    """
+
+    def __init__(self, path=JOBS_FILE):
+        self.path = path
+        self._file_lock = FileLock(path + ".lock")
+        self._lock = threading.Lock()   # FileLock is per process, not per thread
+
+    def _read(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _write(self, records):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(records, f, ensure_ascii=False)
+        os.replace(tmp, self.path)   # readers never see a half-written file
+
+    def _publish(self, record):
+        with self._lock, self._file_lock:
+            records = self._read()
+            records[record["job_id"]] = record
+            self._write(records)
+
+    def get(self, job_id):
+        record = self._read().get(job_id)
+        return job_view(record) if record else None
+
+    def recent(self):
+        now = time.time()
+        return [job_view(r, now) for r in reversed(list(self._read().values()))]
+
+    def start(self, crawl_fn, sources):
+        """Start crawl_fn(sources, progress=job.progress) on a thread.
+        Returns (job view, created); created is False when a run is already active in any worker."""
+        with self._lock, self._file_lock:
+            records = self._read()
+            now = time.time()
+            for record in records.values():
+                view = job_view(record, now)
+                if view["status"] in ("queued", "running"):
+                    return view, False
+            job = CrawlJob(sources, self._publish)
+            records[job.id] = job._record()
+            while len(records) > MAX_JOBS:
+                records.pop(next(iter(records)))
+            self._write(records)
+
+        def _run():
+            try:
+                job.finish(result=crawl_fn(sources, progress=job.progress))
+            except Exception as e:
+                print(f"❌ Crawl job {job.id} failed: {e}")
+                job.finish(error=str(e))
+
+        threading.Thread(target=_run, name=f"crawl-job-{job.id}", daemon=True).start()
+        return job.to_dict(), True
+
+
+jobs = JobRegistry()
@@ -0,0 +1,167 @@
+import os
+import json
+import time
+import random
+import threading
+
+from ..routers import crawl
+from .file_lock import FileLock
+
+# ---------------- Config ----------------
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "data")
+SCHEDULE_FILE = os.path.join(DATA_DIR, "crawl_schedule.json")
+LEADER_LOCK_FILE = os.path.join(DATA_DIR, "crawl_scheduler.lock")
+
+SCHEDULER_ENABLED = os.getenv("CRAWL_SCHEDULER", "1") != "0"
+TICK_SECONDS = 15            # how often the loop checks for due feeds
+DEFAULT_INTERVAL = 600       # first poll interval for a new feed (s)
+MIN_INTERVAL = 120
+MAX_INTERVAL = 3600
+MAX_BACKOFF = 6 * 3600       # cap for repeated errors
+TARGET_NEW_PER_POLL = 1.0    # aim for ~1 new article per poll
+JITTER = 0.1                 # +/-10% so feeds drift apart instead of firing together
+
+
+def _clamp(value, low, high):
+    return max(low, min(high, value))
+
+
+def next_interval(interval, added):
+    """
+    Adapt a feed's interval to how often it actually publishes.
+    Many new items -> poll sooner; nothing new -> back off gradually.
+    """
+    if added > 0:
+        interval = interval * TARGET_NEW_PER_POLL / added
+    else:
+        interval = interval * 1.5
+    return _clamp(interval, MIN_INTERVAL, MAX_INTERVAL)
+
+
+def error_backoff(interval, errors):
+    return min(MAX_BACKOFF, interval * (2 ** errors))
+
+
+class CrawlScheduler:
+    """
+    Background thread that polls each feed in rss_sources.json on its own
+    adaptive interval. Polls go through crawl.crawl_all_feeds (and so through
+    crawl_source / parse_entry) for just the feeds that are due.
+
+    Every uvicorn worker process starts one, but only the process holding the
+    leader lock file ticks; the others retry the lock each tick and take over
+    if the leader exits.
+    """
+
+    def __init__(self, schedule_file=SCHEDULE_FILE, leader_lock_file=LEADER_LOCK_FILE):
+        self.schedule_file = schedule_file
+        self.schedule = crawl.load_json(schedule_file, {})
+        self._leader = FileLock(leader_lock_file)
+        self._dirty = False
+        self._stop = threading.Event()
+        self._thread = None
+
+    # ---------------- State ----------------
+
+    def _save(self):
+        tmp = self.schedule_file + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.schedule, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, self.schedule_file)
+        self._dirty = False
+
+    def _entry(self, url, now):
+        entry = self.schedule.get(url)
+        if entry is None:
+            # Spread first polls over one interval instead of a burst at startup
+            entry = {
+                "interval": DEFAULT_INTERVAL,
+                "next_due": now + random.uniform(0, DEFAULT_INTERVAL),
+                "errors": 0,
+            }
+            self.schedule[url] = entry
+            self._dirty = True
+        return entry
+
+    def due_feeds(self, now=None):
+        now = now or time.time()
+        sources = crawl.load_rss_sources()
+        # forget feeds removed from rss_sources.json
+        for url in list(self.schedule):
+            if url not in sources:
+                del self.schedule[url]
+                self._dirty = True
+        return [url for url in sources if self._entry(url, now)["next_due"] <= now]
+
+    def _reschedule(self, result, now):
+        entry = self.schedule[result["source"]]
+        if result.get("status") in ("error", "timeout"):
+            entry["errors"] += 1
+            delay = error_backoff(entry["interval"], entry["errors"])
+        else:
+            entry["errors"] = 0
+            entry["interval"] = next_interval(entry["interval"], result.get("added", 0))
+            delay = entry["interval"]
+        entry["last_status"] = result.get("status")
+        entry["last_added"] = result.get("added", 0)
+        entry["last_polled"] = now
+        entry["next_due"] = now + delay * random.uniform(1 - JITTER, 1 + JITTER)
+
+    # ---------------- Loop ----------------
+
+    def tick(self):
+        now = time.time()
+        due = self.due_feeds(now)
+        if not due:
+            if self._dirty:
+                self._save()
+            return None
+
+        run_log = crawl.crawl_all_feeds(due, trigger="scheduler", blocking=False)
+        if run_log is None:
+            return None  # a manual crawl holds the lock; retry on the next tick
+
+        now = time.time()
+        for result in run_log["results"]:
+            if result.get("source") in self.schedule:
+                self._reschedule(result, now)
+        self._save()
+        return run_log
+
+    def elect(self):
+        """True if this process is (or just became) the scheduling leader."""
+        if self._leader.held:
+            return True
+        if not self._leader.acquire(blocking=False):
+            return False
+        # the previous leader may have rescheduled feeds since we loaded the file
+        self.schedule = crawl.load_json(self.schedule_file, {})
+        print(f"⏰ Crawl scheduler is leader in process {os.getpid()}")
+        return True
+
+    def _run(self):
+        print(f"⏰ Crawl scheduler started (tick={TICK_SECONDS}s)")
+        while not self._stop.is_set():
+            try:
+                if self.elect():
+                    self.tick()
+            except Exception as e:
+                print(f"⚠️ Scheduler tick failed: {e}")
+            self._stop.wait(TICK_SECONDS)
+        self._leader.release()
+        print("⏰ Crawl scheduler stopped")
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="crawl-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+
+scheduler = CrawlScheduler()
@@ -0,0 +1,96 @@
+import threading
+import torch
+from transformers import StoppingCriteria, StoppingCriteriaList
+
+
+def json_object_closed(text):
+    """True once the first {...} object in text is complete (braces inside strings ignored)."""
+    start = text.find("{")
+    if start < 0:
+        return False
+    depth, in_str, escaped = 0, False, False
+    for ch in text[start:]:
+        if in_str:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_str = False
+        elif ch == '"':
+            in_str = True
+        elif ch == "{":
+            depth += 1
+        elif ch == "}":
+            depth -= 1
+            if depth == 0:
+                return True
+    return False
+
+
+def first_sentence_done(text):
+    """True once a sentence-ending period has been generated."""
+    return "." in text
+
+
+class StopStats:
+    """
+    Totals for one call site, shared across generate() calls and threads.
+    criteria() builds a fresh EarlyStop per call, so concurrent requests never
+    share per-call state.
+    """
+
+    def __init__(self, name=""):
+        self.name = name
+        self.calls = 0
+        self.stopped = 0          # rows halted by the criterion (not by EOS / length)
+        self.tokens_saved = 0     # max_new_tokens - generated tokens, summed over stopped rows
+        self._lock = threading.Lock()
+
+    def criteria(self, tokenizer, done, max_new_tokens):
+        with self._lock:
+            self.calls += 1
+        return StoppingCriteriaList([EarlyStop(tokenizer, done, max_new_tokens, self)])
+
+    def record(self, tokens_saved):
+        with self._lock:
+            self.stopped += 1
+            self.tokens_saved += tokens_saved
+
+    def summary(self):
+        with self._lock:
+            return (f"✂️ Early stop{f' ({self.name})' if self.name else ''}: {self.stopped} rows stopped "
+                    f"over {self.calls} calls, {self.tokens_saved} decode steps saved")
+
+
+class EarlyStop(StoppingCriteria):
+    """
+    Stops each row of one generate() call as soon as done(generated_text)
+    holds, instead of decoding until EOS or max_new_tokens. Single use: build
+    one per call (StopStats.criteria does this).
+    """
+
+    def __init__(self, tokenizer, done, max_new_tokens, stats=None):
+        self.tokenizer = tokenizer
+        self.done = done
+        self.max_new_tokens = max_new_tokens
+        self.stats = stats
+        self._prompt_len = None
+        self._finished = None
+
+    def __call__(self, input_ids, scores, **kwargs):
+        if self._prompt_len is None:
+            # first call comes after the first generated token
+            self._prompt_len = input_ids.shape[1] - 1
+            self._finished = [False] * input_ids.shape[0]
+
+        generated = input_ids[:, self._prompt_len:]
+        for row in range(input_ids.shape[0]):
+            if self._finished[row]:
+                continue
+            text = self.tokenizer.decode(generated[row], skip_special_tokens=True)
+            if self.done(text):
+                self._finished[row] = True
+                if self.stats is not None:
+                    self.stats.record(max(0, self.max_new_tokens - generated.shape[1]))
+        return torch.tensor(self._finished, dtype=torch.bool, device=input_ids.device)
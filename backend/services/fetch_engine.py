@@ -0,0 +1,85 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# ---------------- Config ----------------
+MAX_WORKERS = 16          # total concurrent requests across all hosts
+PER_HOST_LIMIT = 4        # concurrent requests to a single host
+REQUEST_TIMEOUT = 10      # seconds, per HTTP request
+SOURCE_TIMEOUT = 120      # seconds, feed + all of its article pages
+GLOBAL_TIMEOUT = 600      # seconds, whole crawl run
+
+DEFAULT_HEADERS = {"User-Agent": "Mozilla/5.0"}
+
+
+class FetchEngine:
+    """
+    Bounded-concurrency HTTP fetcher shared by the crawler.
+
+    - one requests.Session with a keep-alive connection pool sized to MAX_WORKERS
+    - a semaphore per host so a single site never gets more than PER_HOST_LIMIT requests
+    - a thread pool for article pages (feeds are scheduled by the caller)
+    """
+
+    def __init__(self, max_workers=MAX_WORKERS, per_host=PER_HOST_LIMIT, timeout=REQUEST_TIMEOUT):
+        self.timeout = timeout
+        self.per_host = per_host
+        self.session = requests.Session()
+        self.session.headers.update(DEFAULT_HEADERS)
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="fetch")
+        self._host_locks = {}
+        self._host_locks_guard = threading.Lock()
+
+    def _host_semaphore(self, url):
+        host = urlparse(url).netloc.lower()
+        with self._host_locks_guard:
+            sem = self._host_locks.get(host)
+            if sem is None:
+                sem = threading.BoundedSemaphore(self.per_host)
+                self._host_locks[host] = sem
+            return sem
+
+    def get(self, url, headers=None, timeout=None):
+        """Blocking GET that respects the per-host limit. Raises on network errors."""
+        with self._host_semaphore(url):
+            return self.session.get(url, headers=headers, timeout=timeout or self.timeout)
+
+    def submit(self, fn, *args, **kwargs):
+        return self.pool.submit(fn, *args, **kwargs)
+
+    def close(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
+        self.session.close()
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_engine():
+    """Process-wide engine, created lazily so connection pools survive between crawls."""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = FetchEngine()
+        return _engine
+
+
+class Deadline:
+    """Small helper to share a wall-clock budget between several waits."""
+
+    def __init__(self, seconds):
+        self.end = time.monotonic() + seconds
+
+    def remaining(self):
+        return max(0.0, self.end - time.monotonic())
+
+    def expired(self):
+        return time.monotonic() >= self.end
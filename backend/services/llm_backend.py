@@ -0,0 +1,114 @@
+import os
+import torch
+from datetime import datetime
+from transformers import pipeline, AutoTokenizer, AutoModelForCausalLM
+
+# ---------------- Config ----------------
+# auto      -> cuda-4bit when a GPU is visible, cpu-int8 otherwise
+# cuda-4bit -> bitsandbytes NF4 weights, device_map="auto" (+ offload folder)
+# cpu-int8  -> fp32 weights with torch dynamic int8 quantization of every nn.Linear
+# onnx      -> ONNX Runtime export through optimum (optional dependency)
+LLM_BACKEND = os.getenv("LLM_BACKEND", "auto")
+BACKENDS = ("cuda-4bit", "cpu-int8", "onnx")
+CPU_THREADS = int(os.getenv("LLM_CPU_THREADS", "0"))   # 0 = torch default
+
+
+def pick_backend(name=None):
+    name = name or LLM_BACKEND
+    if name == "auto":
+        return "cuda-4bit" if torch.cuda.is_available() else "cpu-int8"
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown LLM backend {name!r}, expected auto or one of {BACKENDS}")
+    return name
+
+
+def _load_cuda_4bit(model_name, offload_dir):
+    from transformers import BitsAndBytesConfig
+
+    bnb_config = BitsAndBytesConfig(
+        load_in_4bit=True,
+        bnb_4bit_compute_dtype=torch.float16,
+        bnb_4bit_use_double_quant=True,
+    )
+    kwargs = {"offload_folder": offload_dir} if offload_dir else {}
+    return AutoModelForCausalLM.from_pretrained(
+        model_name,
+        device_map="auto",
+        quantization_config=bnb_config,
+        low_cpu_mem_usage=True,
+        trust_remote_code=True,
+        **kwargs,
+    )
+
+
+def _load_cpu_int8(model_name):
+    if CPU_THREADS:
+        torch.set_num_threads(CPU_THREADS)
+    model = AutoModelForCausalLM.from_pretrained(
+        model_name,
+        torch_dtype=torch.float32,
+        low_cpu_mem_usage=True,
+        trust_remote_code=True,
+    )
+    model.eval()
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def _load_onnx(model_name):
+    try:
+        from optimum.onnxruntime import ORTModelForCausalLM
+    except ImportError as e:
+        raise RuntimeError("LLM_BACKEND=onnx needs `pip install optimum[onnxruntime]`") from e
+    return ORTModelForCausalLM.from_pretrained(model_name, export=True, use_cache=True)
+
+
+def load_causal_lm(model_name, backend=None, offload_dir=None, tag=""):
+    """Return (tokenizer, model, backend_name) for the requested or auto-selected backend."""
+    backend = pick_backend(backend)
+    prefix = f"[{tag}] " if tag else ""
+    print(f"{prefix}[{datetime.now().strftime('%H:%M:%S')}] 🔄 Loading {model_name} ({backend})...")
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name, trust_remote_code=True)
+    if backend == "cuda-4bit":
+        model = _load_cuda_4bit(model_name, offload_dir)
+    elif backend == "cpu-int8":
+        model = _load_cpu_int8(model_name)
+    else:
+        model = _load_onnx(model_name)
+    if hasattr(model, "eval"):
+        model.eval()
+
+    print(f"{prefix}[{datetime.now().strftime('%H:%M:%S')}] ✅ Model loaded ({backend})")
+    return tokenizer, model, backend
+
+
+def make_pipeline(tokenizer, model, backend):
+    kwargs = {"torch_dtype": torch.float16} if backend == "cuda-4bit" else {}
+    return pipeline(
+        "text-generation",
+        model=model,
+        tokenizer=tokenizer,
+        trust_remote_code=True,
+        return_full_text=False,
+        **kwargs,
+    )
+
+
+def supports_kv_reuse(model):
+    """Torch HF models expose decoder + LM head separately (needed for prefix caching)."""
+    return hasattr(model, "get_decoder") and hasattr(model, "get_output_embeddings")
+
+
+def last_token_logits(model, input_ids, attention_mask, position_ids):
+    """
+    Logits at the last position. Torch models run the decoder and project only
+    that position; ONNX models return full logits, which are sliced.
+    """
+    if supports_kv_reuse(model):
+        hidden = model.get_decoder()(
+            input_ids=input_ids,
+            attention_mask=attention_mask,
+            position_ids=position_ids,
+        ).last_hidden_state[:, -1, :]
+        return model.get_output_embeddings()(hidden)
+    return model(input_ids=input_ids, attention_mask=attention_mask).logits[:, -1, :]
@@ -0,0 +1,179 @@
+import os
+import re
+import json
+import hashlib
+import threading
+
+# ---------------- Config ----------------
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "data")
+INDEX_FILE = os.path.join(DATA_DIR, "simhash_index.json")
+
+# Similarity = 1 - hamming(simhash_a, simhash_b) / 64.  0.95 ~ at most 3 differing bits.
+NEAR_DUP_THRESHOLD = float(os.getenv("NEAR_DUP_THRESHOLD", "0.95"))
+NEAR_DUP_ACTION = os.getenv("NEAR_DUP_ACTION", "tag")   # "tag" or "drop"
+SHINGLE_SIZE = 3
+MIN_SHINGLES = 8   # very short content (summary-only entries) is not fingerprinted
+HASH_BITS = 64
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def shingles(text, k=SHINGLE_SIZE):
+    tokens = TOKEN_RE.findall((text or "").lower())
+    return {" ".join(tokens[i:i + k]) for i in range(len(tokens) - k + 1)}
+
+
+def simhash(features):
+    weights = [0] * HASH_BITS
+    for feat in features:
+        h = int.from_bytes(hashlib.blake2b(feat.encode("utf-8"), digest_size=8).digest(), "big")
+        for bit in range(HASH_BITS):
+            weights[bit] += 1 if (h >> bit) & 1 else -1
+    value = 0
+    for bit, w in enumerate(weights):
+        if w > 0:
+            value |= 1 << bit
+    return value
+
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
+
+
+class SimHashIndex:
+    """
+    Persistent SimHash index over article content.
+
+    Fingerprints are split into (max_distance + 1) bands; two fingerprints
+    within max_distance bits must agree exactly on at least one band, so
+    candidates are found by band lookup instead of scanning every article.
+
+    It also remembers the ids of near-duplicates that were dropped instead of
+    stored (NEAR_DUP_ACTION=drop), so later crawls skip them before fetching.
+    """
+
+    def __init__(self, path=INDEX_FILE, threshold=NEAR_DUP_THRESHOLD):
+        self.path = path
+        self.max_distance = max(0, int((1 - threshold) * HASH_BITS))
+        self.bands = self.max_distance + 1
+        self.band_bits = HASH_BITS // self.bands
+        self.fingerprints = {}   # article id -> simhash
+        self.dropped = {}        # dropped article id -> id of the article it duplicates
+        self._buckets = {}       # (band, value) -> [article ids]
+        self._lock = threading.Lock()
+        self._load()
+
+    def _band_keys(self, fp):
+        mask = (1 << self.band_bits) - 1
+        return [(b, (fp >> (b * self.band_bits)) & mask) for b in range(self.bands)]
+
+    def _add(self, article_id, fp):
+        self.fingerprints[article_id] = fp
+        for key in self._band_keys(fp):
+            self._buckets.setdefault(key, []).append(article_id)
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        for aid, hex_fp in data.get("fingerprints", {}).items():
+            self._add(aid, int(hex_fp, 16))
+        self.dropped = data.get("dropped", {})
+
+    def save(self):
+        with self._lock:
+            data = {"fingerprints": {aid: f"{fp:016x}" for aid, fp in self.fingerprints.items()},
+                    "dropped": dict(self.dropped)}
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp, self.path)
+
+    def __len__(self):
+        return len(self.fingerprints)
+
+    def fingerprint(self, text):
+        feats = shingles(text)
+        if len(feats) < MIN_SHINGLES:
+            return None
+        return simhash(feats)
+
+    def find(self, fp):
+        """Closest indexed article within max_distance bits, as (id, similarity), or None."""
+        best = self._nearest(fp)
+        if best is None:
+            return None
+        return best[0], round(1 - best[1] / HASH_BITS, 4)
+
+    def _nearest(self, fp):
+        best = None
+        seen = set()
+        for key in self._band_keys(fp):
+            for aid in self._buckets.get(key, ()):
+                if aid in seen:
+                    continue
+                seen.add(aid)
+                dist = hamming(fp, self.fingerprints[aid])
+                if dist <= self.max_distance and (best is None or dist < best[1]):
+                    best = (aid, dist)
+        return best
+
+    def check(self, article, pending):
+        """
+        Return (duplicate_of_id, similarity) for a near-duplicate of an indexed
+        article or of one in `pending`, else None. A new article's fingerprint
+        goes into `pending` ({id: simhash}); it reaches the index only through
+        commit(pending), once the article has actually been stored.
+        """
+        fp = self.fingerprint(article.get("content"))
+        if fp is None:
+            return None
+        with self._lock:
+            best = self._nearest(fp)
+        for aid, other in pending.items():
+            dist = hamming(fp, other)
+            if dist <= self.max_distance and (best is None or dist < best[1]):
+                best = (aid, dist)
+        if best is None:
+            pending[article["id"]] = fp
+            return None
+        return best[0], round(1 - best[1] / HASH_BITS, 4)
+
+    def commit(self, pending, dropped=None):
+        """Index the fingerprints of stored articles and remember dropped ids ({id: duplicate_of})."""
+        with self._lock:
+            for aid, fp in pending.items():
+                if aid not in self.fingerprints:
+                    self._add(aid, fp)
+            self.dropped.update(dropped or {})
+
+    def dropped_ids(self):
+        with self._lock:
+            return set(self.dropped)
+
+    def backfill(self, articles):
+        for art in articles:
+            if art.get("id") and art["id"] not in self.fingerprints:
+                fp = self.fingerprint(art.get("content"))
+                if fp is not None:
+                    self._add(art["id"], fp)
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_index(store=None):
+    """Process-wide index; on first use it is seeded from the article store."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = SimHashIndex()
+            if not len(_index) and store is not None and len(store):
+                _index.backfill(store.iter_articles())
+                _index.save()
+        return _index
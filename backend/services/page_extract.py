@@ -0,0 +1,96 @@
+"""
+CPU-bound page processing for the crawler (readability + author extraction).
+
+Runs in a process pool so HTML parsing never holds the GIL of the FastAPI
+worker. Each page is parsed once into an lxml tree; readability works on a
+copy of that tree and the author heuristics read the original.
+"""
+import copy
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import lxml.html
+from readability import Document
+from readability.cleaners import html_cleaner
+from readability.htmls import utf8_parser
+
+from .author_extraction import extractor, node_text
+
+PAGE_WORKERS = max(1, (os.cpu_count() or 2) - 1)
+
+
+# ---------------- Tree helpers ----------------
+
+def parse_tree(html):
+    """Same parser settings readability uses, so the tree can be handed to it."""
+    if isinstance(html, str):
+        html = html.encode("utf-8", "replace")
+    return lxml.html.document_fromstring(html, parser=utf8_parser)
+
+class TreeDocument(Document):
+    """readability Document that starts from an already parsed tree instead of
+    re-parsing the HTML string on every summary() retry."""
+
+    def __init__(self, tree, **kwargs):
+        super().__init__("", **kwargs)
+        self._tree = tree
+
+    def _parse(self, input):
+        doc = html_cleaner.clean_html(copy.deepcopy(self._tree))
+        doc.resolve_base_href(handle_failures=self.handle_failures)
+        return doc
+
+
+# ---------------- Authors ----------------
+
+def extract_authors_from_tree(tree, url=None):
+    return extractor.from_tree(tree, url)
+
+def extract_authors_from_html(html: str, url=None):
+    if not html:
+        return []
+    try:
+        return extractor.from_tree(parse_tree(html), url)
+    except Exception:
+        return []
+
+
+# ---------------- Page stage ----------------
+
+def extract_page(page_html, want_authors=True, url=None):
+    """Worker entry point: HTML -> (content_text, authors) from a single parse."""
+    try:
+        tree = parse_tree(page_html)
+    except Exception:
+        return "", []
+
+    authors = extractor.from_tree(tree, url) if want_authors else []
+    try:
+        summary = TreeDocument(tree).summary()
+        content_text = node_text(parse_tree(summary), sep="\n")
+    except Exception:
+        content_text = ""
+    return content_text, authors
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=PAGE_WORKERS)
+        return _pool
+
+def extract_page_async(page_html, want_authors=True, url=None):
+    """Run extract_page in the process pool; falls back to inline if the pool died."""
+    global _pool
+    try:
+        return get_pool().submit(extract_page, page_html, want_authors, url).result()
+    except BrokenProcessPool:
+        with _pool_lock:
+            _pool = None
+        return extract_page(page_html, want_authors, url)
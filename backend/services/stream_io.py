@@ -0,0 +1,131 @@
+import os
+import re
+import json
+
+# ---------------- Config ----------------
+READ_CHUNK = 1 << 16                # characters read per refill
+SEPARATOR_RE = re.compile(r"[\s,]*")  # whitespace / array commas between records
+
+
+def existing_path(path, *legacy_paths):
+    """First of path, *legacy_paths that exists on disk; path itself if none do."""
+    for p in (path,) + legacy_paths:
+        if os.path.exists(p):
+            return p
+    return path
+
+
+def iter_records(path):
+    """
+    Yield records from a JSON-lines file one at a time.
+
+    Lines are parsed independently: a torn or corrupt line (crash mid-append)
+    is skipped with a warning and the records after it are still returned.
+    Also accepts the legacy formats during migration -- a JSON array (streamed
+    element by element, never loaded whole) or a single pretty-printed object.
+    """
+    if not os.path.exists(path):
+        return
+
+    with open(path, "r", encoding="utf-8") as f:
+        head = f.read(READ_CHUNK)
+        first = head.lstrip()[:1]
+        f.seek(0)
+        if first == "[":
+            yield from _iter_array(f, path)
+            return
+
+        for lineno, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                if lineno == 1 and line.startswith("{"):
+                    # maybe a legacy single pretty-printed object
+                    f.seek(0)
+                    try:
+                        record = json.load(f)
+                    except json.JSONDecodeError:
+                        f.seek(0)
+                        f.readline()
+                    else:
+                        yield record
+                        return
+                print(f"⚠️ Skipping malformed line {lineno} of {path}")
+
+
+def _iter_array(f, path):
+    """Stream the elements of a (legacy) top-level JSON array."""
+    decoder = json.JSONDecoder()
+    buf, pos, eof = "", 0, False
+    opened = False
+
+    while True:
+        pos = SEPARATOR_RE.match(buf, pos).end()
+        if pos >= len(buf):
+            if eof:
+                return
+            chunk = f.read(READ_CHUNK)
+            eof = not chunk
+            buf, pos = chunk, 0
+            continue
+
+        if not opened:
+            opened = True
+            pos += 1   # the "["
+            continue
+        if buf[pos] == "]":
+            return
+
+        try:
+            record, end = decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            if eof:
+                print(f"⚠️ Skipping truncated record at end of {path}")
+                return
+            chunk = f.read(READ_CHUNK)
+            eof = not chunk
+            buf, pos = buf[pos:] + chunk, 0
+            continue
+
+        yield record
+        pos = end
+
+
+def write_records(path, records):
+    """Write records as JSON lines, replacing path atomically. Returns the count."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    count = 0
+    with open(tmp, "w", encoding="utf-8") as f:
+        for rec in records:
+            f.write(json.dumps(rec, ensure_ascii=False))
+            f.write("\n")
+            count += 1
+    os.replace(tmp, path)
+    return count
+
+
+def append_records(path, records):
+    """Append records as JSON lines and flush them to disk. Returns the count."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    # a crash mid-append leaves a line without "\n"; start on a fresh line so the
+    # new records stay parseable and only the torn line is skipped by iter_records
+    torn = False
+    if os.path.exists(path) and os.path.getsize(path):
+        with open(path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            torn = f.read(1) != b"\n"
+    count = 0
+    with open(path, "a", encoding="utf-8") as f:
+        if torn:
+            f.write("\n")
+        for rec in records:
+            f.write(json.dumps(rec, ensure_ascii=False))
+            f.write("\n")
+            count += 1
+        f.flush()
+        os.fsync(f.fileno())
+    return count
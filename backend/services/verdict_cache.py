@@ -0,0 +1,107 @@
+import os
+import time
+import sqlite3
+import hashlib
+import unicodedata
+
+# ---------------- Config ----------------
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "data")
+CACHE_DB = os.path.join(DATA_DIR, "claim_verdicts.sqlite")
+
+MAX_ENTRIES = int(os.getenv("VERDICT_CACHE_MAX", "500000"))
+EVICT_TO = 0.9   # after overflowing, trim back to 90% of MAX_ENTRIES (least recently used first)
+
+
+def normalize_sentence(sentence):
+    return " ".join(unicodedata.normalize("NFC", sentence or "").split())
+
+
+class VerdictCache:
+    """
+    On-disk sentence -> verdict store for the claim classifier.
+
+    Keys are sha1(namespace + normalized sentence); the namespace carries model,
+    prompt version and mode, so changing any of them never serves stale verdicts.
+    The probability is stored next to the YES/NO verdict (score mode) so the
+    threshold can change without invalidating the cache. Only LLM verdicts are
+    stored, with their sentence and namespace, so the table doubles as clean
+    training data for the prefilter (labelled()).
+    """
+
+    def __init__(self, path=CACHE_DB, max_entries=MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS verdicts ("
+            " key TEXT PRIMARY KEY, verdict INTEGER NOT NULL, prob REAL, last_used REAL NOT NULL,"
+            " sentence TEXT, namespace TEXT)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS ix_verdicts_last_used ON verdicts(last_used)")
+        self.conn.commit()
+
+    @staticmethod
+    def key(sentence, namespace):
+        return hashlib.sha1(f"{namespace}\x00{normalize_sentence(sentence)}".encode("utf-8")).hexdigest()
+
+    def get_many(self, keys):
+        """{key: (verdict, prob)} for the keys that are cached; refreshes their LRU time."""
+        found = {}
+        unique = list(dict.fromkeys(keys))
+        for i in range(0, len(unique), 500):   # stay under SQLite's bound-parameter limit
+            chunk = unique[i:i + 500]
+            rows = self.conn.execute(
+                f"SELECT key, verdict, prob FROM verdicts WHERE key IN ({','.join('?' * len(chunk))})",
+                chunk,
+            ).fetchall()
+            for k, verdict, prob in rows:
+                found[k] = (bool(verdict), prob)
+
+        if found:
+            now = time.time()
+            self.conn.executemany("UPDATE verdicts SET last_used = ? WHERE key = ?", [(now, k) for k in found])
+            self.conn.commit()
+        self.hits += sum(1 for k in keys if k in found)
+        self.misses += sum(1 for k in keys if k not in found)
+        return found
+
+    def put_many(self, items, namespace):
+        """items: iterable of (sentence, verdict, prob) decided by the LLM under namespace."""
+        now = time.time()
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO verdicts (key, verdict, prob, last_used, sentence, namespace)"
+            " VALUES (?, ?, ?, ?, ?, ?)",
+            [(self.key(s, namespace), int(v), p, now, s, namespace) for s, v, p in items],
+        )
+        self.conn.commit()
+        self._evict()
+
+    def _evict(self):
+        count = self.conn.execute("SELECT COUNT(*) FROM verdicts").fetchone()[0]
+        if count <= self.max_entries:
+            return
+        drop = count - int(self.max_entries * EVICT_TO)
+        self.conn.execute(
+            "DELETE FROM verdicts WHERE key IN (SELECT key FROM verdicts ORDER BY last_used LIMIT ?)",
+            (drop,),
+        )
+        self.conn.commit()
+        print(f"🧹 Verdict cache evicted {drop} least recently used entries")
+
+    def labelled(self):
+        """(sentence, verdict, namespace) for every stored LLM verdict, least recently used first."""
+        rows = self.conn.execute(
+            "SELECT sentence, verdict, namespace FROM verdicts WHERE sentence IS NOT NULL ORDER BY last_used"
+        )
+        for sentence, verdict, namespace in rows:
+            yield sentence, bool(verdict), namespace
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM verdicts").fetchone()[0]
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,147 @@
+import os
+import json
+import time
+import sqlite3
+
+# ---------------- Config ----------------
+LEASE_SECONDS = float(os.getenv("WORK_LEASE_SECONDS", "900"))
+MAX_ATTEMPTS = int(os.getenv("WORK_MAX_ATTEMPTS", "3"))   # leases before a unit is marked failed
+
+
+class WorkQueue:
+    """
+    SQLite-backed queue of work units shared by several worker processes.
+
+    A unit is a JSON list of items. Workers claim the oldest pending unit under
+    a time-limited lease and renew it while they make progress; a unit whose
+    lease expires (worker killed or hung) goes back to pending and is handed
+    to the next worker, so a crash loses at most the unit in flight.
+
+    put() skips items whose key is already in a pending, leased or failed unit.
+    Keys of done units can be enqueued again, so the caller decides what still
+    lacks a result (e.g. a record lost after its unit completed). Failed units
+    stay parked until requeue_failed().
+    """
+
+    def __init__(self, path, lease_seconds=LEASE_SECONDS, max_attempts=MAX_ATTEMPTS):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # autocommit mode: claim() opens its own BEGIN IMMEDIATE transaction
+        self.conn = sqlite3.connect(path, timeout=60, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS units ("
+            " unit_id INTEGER PRIMARY KEY AUTOINCREMENT, payload TEXT NOT NULL,"
+            " status TEXT NOT NULL DEFAULT 'pending', worker TEXT, lease_until REAL,"
+            " attempts INTEGER NOT NULL DEFAULT 0, finished REAL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS ix_units_status ON units(status, unit_id)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS unit_keys (key TEXT PRIMARY KEY, unit_id INTEGER NOT NULL)")
+
+    def put(self, items, key, unit_size):
+        """Group items not already queued (by key(item)) into units of unit_size. Returns (units, items) added."""
+        known = {row[0] for row in self.conn.execute(
+            "SELECT k.key FROM unit_keys k JOIN units u ON u.unit_id = k.unit_id"
+            " WHERE u.status IN ('pending', 'leased', 'failed')"
+        )}
+        units = added = 0
+        chunk = []
+
+        def flush():
+            nonlocal units, added
+            if not chunk:
+                return
+            self.conn.execute("BEGIN IMMEDIATE")
+            unit_id = self.conn.execute(
+                "INSERT INTO units (payload) VALUES (?)", (json.dumps(chunk, ensure_ascii=False),)
+            ).lastrowid
+            self.conn.executemany("INSERT OR REPLACE INTO unit_keys (key, unit_id) VALUES (?, ?)",
+                                  [(str(key(item)), unit_id) for item in chunk])
+            self.conn.execute("COMMIT")
+            units += 1
+            added += len(chunk)
+            chunk.clear()
+
+        for item in items:
+            k = str(key(item))   # stored as TEXT
+            if k in known:
+                continue
+            known.add(k)
+            chunk.append(item)
+            if len(chunk) >= unit_size:
+                flush()
+        flush()
+        return units, added
+
+    def claim(self, worker):
+        """Lease the oldest available unit to worker: (unit_id, items), or None when nothing is left."""
+        now = time.time()
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            # expired leases: back to pending, or failed after too many attempts
+            self.conn.execute(
+                "UPDATE units SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,"
+                " worker = NULL, lease_until = NULL WHERE status = 'leased' AND lease_until < ?",
+                (self.max_attempts, now),
+            )
+            row = self.conn.execute(
+                "SELECT unit_id, payload FROM units WHERE status = 'pending' ORDER BY unit_id LIMIT 1"
+            ).fetchone()
+            if row is not None:
+                self.conn.execute(
+                    "UPDATE units SET status = 'leased', worker = ?, lease_until = ?, attempts = attempts + 1"
+                    " WHERE unit_id = ?",
+                    (worker, now + self.lease_seconds, row[0]),
+                )
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        return (row[0], json.loads(row[1])) if row else None
+
+    def _update_leased(self, sql, params, unit_id, worker):
+        cur = self.conn.execute(
+            f"UPDATE units SET {sql} WHERE unit_id = ? AND worker = ? AND status = 'leased'",
+            (*params, unit_id, worker),
+        )
+        return cur.rowcount == 1
+
+    def renew(self, unit_id, worker):
+        """Extend the lease; False if the unit was already handed to someone else."""
+        return self._update_leased("lease_until = ?", (time.time() + self.lease_seconds,), unit_id, worker)
+
+    def complete(self, unit_id, worker):
+        return self._update_leased("status = 'done', lease_until = NULL, finished = ?", (time.time(),), unit_id, worker)
+
+    def release(self, unit_id, worker):
+        """Give a unit back without finishing it (e.g. on Ctrl+C), so it does not wait for its lease to expire.
+        The lease does not count as an attempt."""
+        return self._update_leased("status = 'pending', worker = NULL, lease_until = NULL, attempts = attempts - 1",
+                                   (), unit_id, worker)
+
+    def fail(self, unit_id, worker):
+        """The unit raised: retry it, or park it as failed once it has used max_attempts leases."""
+        return self._update_leased(
+            "status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, worker = NULL, lease_until = NULL",
+            (self.max_attempts,), unit_id, worker,
+        )
+
+    def requeue_failed(self):
+        """Give failed units a fresh set of attempts. Returns how many were requeued."""
+        cur = self.conn.execute(
+            "UPDATE units SET status = 'pending', attempts = 0, worker = NULL, lease_until = NULL"
+            " WHERE status = 'failed'"
+        )
+        return cur.rowcount
+
+    def stats(self):
+        counts = dict(self.conn.execute("SELECT status, COUNT(*) FROM units GROUP BY status").fetchall())
+        expired = self.conn.execute(
+            "SELECT COUNT(*) FROM units WHERE status = 'leased' AND lease_until < ?", (time.time(),)
+        ).fetchone()[0]
+        return {s: counts.get(s, 0) for s in ("pending", "leased", "done", "failed")} | {"expired": expired}
+
+    def close(self):
+        self.conn.close()
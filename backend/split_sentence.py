@@ -1,46 +1,75 @@
 import os
 import json
 import re
-import textwrap
+import hashlib
+import argparse
+from multiprocessing import Pool
+
+try:
+    from services.article_store import ArticleStore
+    from services.stream_io import existing_path, iter_records, write_records
+except ImportError:
+    from backend.services.article_store import ArticleStore
+    from backend.services.stream_io import existing_path, iter_records, write_records
 
 DATA_DIR = "data"
-INPUT_FILE = os.path.join(DATA_DIR, "crawled_articles.json")
-OUTPUT_FILE = os.path.join(DATA_DIR, "crawled_sentences.json")
+OUTPUT_FILE = os.path.join(DATA_DIR, "crawled_sentences.jsonl")
+LEGACY_OUTPUT_FILE = os.path.join(DATA_DIR, "crawled_sentences.json")
+STATE_FILE = os.path.join(DATA_DIR, "sentence_state.json")  # article id -> content hash
+
+# Bump when the normalizer/splitter rules change so incremental runs re-split everything
+SPLITTER_VERSION = 1
+
+CHUNK_SIZE = 64  # articles per work unit sent to a pool worker
+
+# ---------------- Compiled patterns ----------------
+# normalize_text used to run ~15 uncompiled re.sub / str.replace passes per article.
+# Passes that cannot interact are fused below; the ones whose order matters
+# (",." then "..", and the four parenthesis rules) stay separate but precompiled.
+# Output is byte-identical to the old implementation (backend/benchmarks/bench_split_sentence.py).
+
+# caption lead-ins (case-insensitive) and ALL-CAPS tokens, removed in one scan;
+# the lookahead lets the engine skip positions that cannot start either one
+DROP_RE = re.compile(r"(?=[ẢảNnTtA-Z])\b(?:(?i:Ảnh minh họa|Ảnh|Nguồn|Theo)\b[: ]*[^.!?]*|[A-Z]{2,}\b)")
+# dots that must not end a sentence: currency units and dates like 12/3.
+PROTECT = (
+    (" USD.", " USD<eos>"),
+    (" VND.", " VND<eos>"),
+    (" đồng.", " đồng<eos>"),
+)
+DATE_DOT_RE = re.compile(r"(\d/\d+)\.")
+COMMA_DOT_RE = re.compile(r",\s*\.")
+DOUBLE_DOT_RE = re.compile(r"\.\s*\.")
+EMPTY_PAREN_RE = re.compile(r"\(\s*\)")
+SYMBOL_PAREN_RE = re.compile(r"\(\s*[^A-Za-zÀ-ỹ0-9]+\s*\)")
+NUMBER_PAREN_RE = re.compile(r"\(\s*[0-9\/\.]+\s*\)")
+SPLIT_RE = re.compile(r'(?<=[.!?])\s+(?=["“A-ZÀ-Ỹ0-9])')
+NEW_SENTENCE_RE = re.compile(r'["“]?[A-ZÀ-Ỹ0-9]')
 
 def normalize_text(text: str):
     if not text:
         return ""
-    text = textwrap.dedent(text)
-    text = re.sub(r"\s*\n\s*", " ", text)
-    text = re.sub(r"\s+", " ", text).strip()
-    text = re.sub(
-        r"\b(Ảnh minh họa|Ảnh|Nguồn|Theo)\b[: ]*[^.!?]*",
-        "",
-        text,
-        flags=re.IGNORECASE
-    )
-    text = re.sub(r"\b[A-Z]{2,}\b", "", text)
-    protect = {
-        " USD.": " USD<eos>",
-        " VND.": " VND<eos>",
-        " đồng.": " đồng<eos>"
-    }
-    for k, v in protect.items():
+    # dedent + newline folding + whitespace collapse + strip
+    text = " ".join(text.split())
+    text = DROP_RE.sub("", text)
+    for k, v in PROTECT:
         text = text.replace(k, v)
-    text = re.sub(r"(\d+\/\d+)\.", r"\1<eos>", text)
-    text = re.sub(r",\s*\.", ".", text)
-    text = re.sub(r"\.\s*\.", ".", text)
-    text = re.sub(r"\(\s*\)", "", text)
-    text = re.sub(r"\(\s*[^A-Za-zÀ-ỹ0-9]+\s*\)", "", text)
-    text = re.sub(r"\(\s*[0-9\/\.]+\s*\)", "", text)
-    text = re.sub(r"\(\s*\)", "", text)
-    text = re.sub(r"\s{2,}", " ", text)
-
-    return text.strip()
+    if "/" in text:
+        text = DATE_DOT_RE.sub(r"\1<eos>", text)
+    if "," in text:
+        text = COMMA_DOT_RE.sub(".", text)
+    text = DOUBLE_DOT_RE.sub(".", text)
+    if "(" in text:
+        text = EMPTY_PAREN_RE.sub("", text)
+        text = SYMBOL_PAREN_RE.sub("", text)
+        text = NUMBER_PAREN_RE.sub("", text)
+        text = EMPTY_PAREN_RE.sub("", text)
+
+    return " ".join(text.split())
 
 def split_vietnamese_sentences(content: str):
     text = normalize_text(content)
-    raw = re.split(r'(?<=[.!?])\s+(?=["“A-ZÀ-Ỹ0-9])', text)
+    raw = SPLIT_RE.split(text)
 
     sentences = []
     for s in raw:
@@ -48,8 +77,9 @@ def split_vietnamese_sentences(content: str):
         if not s:
             continue
         s = s.replace("<eos>", ".")
-        s = re.sub(r",\s*\.", ".", s)
-        s = re.sub(r"\.\s*\.", ".", s)
+        if "," in s:
+            s = COMMA_DOT_RE.sub(".", s)
+        s = DOUBLE_DOT_RE.sub(".", s)
         if s in {".", "..", "..."}:
             continue
         sentences.append(s)
@@ -64,9 +94,7 @@ def split_vietnamese_sentences(content: str):
 
         open_quotes = (buf.count('"') % 2 == 1) or (buf.count("“") % 2 == 1)
 
-        looks_like_new = re.match(r'^["“]?[A-ZÀ-Ỹ0-9]', s) is not None
-
-        if open_quotes and not looks_like_new:
+        if open_quotes and NEW_SENTENCE_RE.match(s) is None:
             buf += " " + s
         else:
             merged.append(buf)
@@ -75,41 +103,106 @@ def split_vietnamese_sentences(content: str):
     if buf:
         merged.append(buf)
 
-    final = []
-    for s in merged:
-        if len(s.split()) >= 9:
-            final.append(s)
-
-    return final
-
-def process_crawled_articles():
-    if not os.path.exists(INPUT_FILE):
-        raise FileNotFoundError(f"Missing: {INPUT_FILE}")
-
-    with open(INPUT_FILE, "r", encoding="utf-8") as f:
-        articles = json.load(f)
-
-    output = []
-
-    for art in articles:
+    return [s for s in merged if len(s.split()) >= 9]
+
+def content_hash(content: str):
+    return hashlib.md5((content or "").encode("utf-8")).hexdigest()
+
+def load_json(path, default):
+    if not os.path.exists(path):
+        return default
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except json.JSONDecodeError:
+        return default
+
+def process_crawled_articles(full: bool = False, workers: int = 1):
+    """
+    Split crawled articles into sentences.
+    Incremental by default: only articles whose content hash changed since the
+    last run are re-split; everything else is carried over from OUTPUT_FILE
+    (JSON lines; a legacy crawled_sentences.json array is read once and migrated).
+    full=True re-splits the whole corpus.
+    workers > 1 shards the articles to split across a process pool in chunks
+    of CHUNK_SIZE; results come back in store order and are written as they arrive.
+    """
+    store = ArticleStore(read_only=True)
+    if not len(store):
+        raise FileNotFoundError(f"No crawled articles in {store.root}")
+
+    state = load_json(STATE_FILE, {})
+    if state.get("version") != SPLITTER_VERSION:
+        full = True
+    hashes = {} if full else state.get("hashes", {})
+    previous_file = existing_path(OUTPUT_FILE, LEGACY_OUTPUT_FILE)
+    previous_ids = [] if full else [r.get("id") for r in iter_records(previous_file)]
+    have_previous = set(previous_ids)
+
+    # Pass 1: output order + which articles need splitting (hashes only, no content kept)
+    order = []
+    todo = set()
+    for art in store.iter_articles():
         article_id = art.get("id")
-        content = art.get("content", "")
-
         if not article_id:
             continue
+        if art.get("near_duplicate_of"):
+            continue  # same story already covered by the article it duplicates
+
+        order.append(article_id)
+        h = content_hash(art.get("content", ""))
+        if hashes.get(article_id) != h or article_id not in have_previous:
+            hashes[article_id] = h
+            todo.add(article_id)
+
+    # Unchanged records are streamed back from the previous output, which works
+    # as long as it lists them in store order (always true for files written here)
+    keep = [aid for aid in order if aid not in todo]
+    keep_set = set(keep)
+    if [aid for aid in previous_ids if aid in keep_set] != keep:
+        print("⚠️ Previous sentence file is not in store order, re-splitting everything")
+        todo.update(keep)
+        keep_set = set()
+    del previous_ids, have_previous, keep
+
+    # Pass 2: stream the content of articles to split, in store order
+    def pending():
+        for art in store.iter_articles():
+            if art.get("id") in todo:
+                yield art.get("content", "")
+
+    pool = Pool(workers) if workers > 1 and len(todo) > CHUNK_SIZE else None
+    try:
+        if pool:
+            print(f"⚙️ Splitting {len(todo)} articles on {workers} processes")
+            results = pool.imap(split_vietnamese_sentences, pending(), chunksize=CHUNK_SIZE)
+        else:
+            results = map(split_vietnamese_sentences, pending())
+
+        kept = (r for r in iter_records(previous_file) if r.get("id") in keep_set)
 
-        sentences = split_vietnamese_sentences(content)
+        def records():
+            for article_id in order:
+                if article_id in todo:
+                    yield {"id": article_id, "sentences": next(results)}
+                else:
+                    yield next(kept)
 
-        output.append({
-            "id": article_id,
-            "sentences": sentences
-        })
+        # write_records goes through a temp file, so previous_file can still be read here
+        total = write_records(OUTPUT_FILE, records())
+    finally:
+        if pool:
+            pool.terminate()
 
-    with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-        json.dump(output, f, ensure_ascii=False, indent=2)
+    with open(STATE_FILE, "w", encoding="utf-8") as f:
+        json.dump({"version": SPLITTER_VERSION, "hashes": hashes}, f)
 
     print(f"✔ Cleaned sentences saved → {OUTPUT_FILE}")
-    print(f"✔ Total articles processed: {len(output)}")
+    print(f"✔ Total articles: {total} ({len(todo)} split, {total - len(todo)} unchanged)")
 
 if __name__ == "__main__":
-    process_crawled_articles()
+    parser = argparse.ArgumentParser(description="Split crawled articles into sentences")
+    parser.add_argument("--full", action="store_true", help="re-split every article instead of only new/changed ones")
+    parser.add_argument("--workers", type=int, default=1, help="processes for splitting (0 = all cores)")
+    args = parser.parse_args()
+    process_crawled_articles(full=args.full, workers=args.workers or os.cpu_count() or 1)
@@ -9,6 +9,11 @@ from transformers import (
     AutoModelForSequenceClassification,
 )
 
+try:
+    from services.stream_io import existing_path, iter_records
+except ImportError:
+    from backend.services.stream_io import existing_path, iter_records
+
 # =====================================================
 # CONFIG
 # =====================================================
@@ -18,8 +23,9 @@ NLI_MODEL = "MoritzLaurer/mDeBERTa-v3-base-mnli-xnli"
 
 MIN_CLAIMS_PER_GROUP = 2
 CONFIDENCE_THRESHOLD = 0.65
-INPUT_PATH = "./data/claims_enriched.json"
-OUTPUT_PATH = "./data/claims_grouped_summary.json"
+INPUT_PATH = "./data/claims_enriched.jsonl"
+LEGACY_INPUT_PATH = "./data/claims_enriched.json"
+OUTPUT_PATH = "./data/claims_grouped_summary.json"   # stays a JSON array: read by the frontend
 
 device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
 
@@ -36,12 +42,13 @@ model_nli = AutoModelForSequenceClassification.from_pretrained(NLI_MODEL).to(dev
 # =====================================================
 # LOAD & FLATTEN DATA (NEW ENRICHED FLAT FORMAT)
 # =====================================================
-raw_data = json.load(open(INPUT_PATH, "r", encoding="utf-8"))
-print(f"📥 Loaded {len(raw_data)} enriched claim rows.")
-
+# rows are streamed; only the fields used below are kept for claims that pass the filter
 claims = []
+row_count = 0
+
+for item in iter_records(existing_path(INPUT_PATH, LEGACY_INPUT_PATH)):
+    row_count += 1
 
-for item in raw_data:
     # must contain text
     text = item.get("text")
     if not text:
@@ -62,6 +69,7 @@ for item in raw_data:
         "keywords": item.get("keywords", []),
     })
 
+print(f"📥 Read {row_count} enriched claim rows.")
 print(f"📚 Loaded {len(claims)} valid high-confidence claims.")
 
 # =====================================================
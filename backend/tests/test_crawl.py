@@ -0,0 +1,150 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+from backend.routers import crawl
+from backend.services import article_db, near_duplicate
+from backend.services.article_store import ArticleStore
+from backend.services.crawl_scheduler import CrawlScheduler
+from backend.services.file_lock import FileLock
+
+
+def _article(url, n):
+    return {
+        "id": crawl.article_id(url),
+        "url": url,
+        "title": f"Bài {n}",
+        "content": f"nội dung bài báo số {n} " + " ".join(f"từ{n}x{i}" for i in range(30)),
+        "date": "2024-01-01",
+    }
+
+
+def _isolate(tmp_path, monkeypatch):
+    store = ArticleStore(root=str(tmp_path / "articles"), legacy_file=None)
+    index = near_duplicate.SimHashIndex(path=str(tmp_path / "simhash_index.json"))
+    monkeypatch.setattr(crawl, "get_store", lambda: store)
+    monkeypatch.setattr(crawl, "LOG_FILE", str(tmp_path / "crawl_logs.json"))
+    monkeypatch.setattr(crawl, "FEED_STATE_FILE", str(tmp_path / "feed_state.json"))
+    monkeypatch.setattr(crawl, "crawl_file_lock", FileLock(str(tmp_path / "crawl.lock")))
+    monkeypatch.setattr(near_duplicate, "get_index", lambda store=None: index)
+    monkeypatch.setattr(article_db, "ARTICLE_DB_ENABLED", False)
+    return store, index
+
+
+def test_failing_feed_does_not_abort_crawl(tmp_path, monkeypatch):
+    store, _ = _isolate(tmp_path, monkeypatch)
+
+    def crawl_source(url, engine, timeout, state, known_ids, run_deadline):
+        if url == "https://bad.example/rss":
+            raise RuntimeError("feed exploded")
+        articles = [_article(f"https://good.example/a{i}", i) for i in range(2)]
+        return articles, {"source": url, "added": 0, "failed": 0, "elapsed": 0.1}
+
+    monkeypatch.setattr(crawl, "crawl_source", crawl_source)
+
+    run_log = crawl.crawl_all_feeds(["https://bad.example/rss", "https://good.example/rss"])
+
+    by_source = {r["source"]: r for r in run_log["results"]}
+    assert by_source["https://bad.example/rss"]["status"] == "error"
+    assert "elapsed" in by_source["https://bad.example/rss"]
+    assert by_source["https://good.example/rss"]["added"] == 2
+    assert run_log["total_new"] == 2
+    assert len(store) == 2
+
+
+def test_near_duplicate_index_waits_for_store_append(tmp_path, monkeypatch):
+    store, index = _isolate(tmp_path, monkeypatch)
+    articles = [_article(f"https://good.example/a{i}", i) for i in range(2)]
+    monkeypatch.setattr(crawl, "crawl_source", lambda url, *a: (
+        [dict(art) for art in articles], {"source": url, "added": 0, "failed": 0, "elapsed": 0.1}))
+
+    def broken_append(new_articles):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(store, "append", broken_append)
+    try:
+        crawl.crawl_all_feeds(["https://good.example/rss"])
+    except OSError:
+        pass
+    assert len(index) == 0   # nothing stored, nothing indexed
+
+    monkeypatch.undo()
+    store, index = _isolate(tmp_path, monkeypatch)
+    monkeypatch.setattr(crawl, "crawl_source", lambda url, *a: (
+        [dict(art) for art in articles], {"source": url, "added": 0, "failed": 0, "elapsed": 0.1}))
+    run_log = crawl.crawl_all_feeds(["https://good.example/rss"])
+
+    assert run_log["total_near_duplicates"] == 0
+    assert len(store) == 2 and len(index) == 2
+    assert not any("near_duplicate_of" in art for art in store.iter_articles())
+
+
+def test_dropped_near_duplicates_are_not_fetched_again(tmp_path, monkeypatch):
+    store, index = _isolate(tmp_path, monkeypatch)
+    monkeypatch.setattr(near_duplicate, "NEAR_DUP_ACTION", "drop")
+    original = _article("https://a.example/story", 1)
+    copy = dict(original, id=crawl.article_id("https://b.example/story"), url="https://b.example/story")
+    seen_known = []
+
+    def crawl_source(url, engine, timeout, state, known_ids, run_deadline):
+        seen_known.append(known_ids)
+        fresh = [dict(art) for art in (original, copy) if art["id"] not in known_ids]
+        return fresh, {"source": url, "added": 0, "failed": 0, "elapsed": 0.1}
+
+    monkeypatch.setattr(crawl, "crawl_source", crawl_source)
+
+    first = crawl.crawl_all_feeds(["https://a.example/rss"])
+    assert first["total_near_duplicates"] == 1 and len(store) == 1
+    assert copy["id"] not in store
+
+    crawl.crawl_all_feeds(["https://a.example/rss"])
+    assert copy["id"] in seen_known[-1]   # skipped before any page fetch
+
+    reloaded = near_duplicate.SimHashIndex(path=index.path)
+    assert reloaded.dropped_ids() == {copy["id"]}
+def test_crawl_skips_while_another_process_holds_the_lock(tmp_path, monkeypatch):
+    _isolate(tmp_path, monkeypatch)
+    monkeypatch.setattr(crawl, "crawl_source", lambda *a: ([], {"source": a[0], "added": 0, "failed": 0, "elapsed": 0.1}))
+
+    # a second FileLock opens its own descriptor, like another uvicorn worker would
+    with FileLock(str(tmp_path / "crawl.lock")):
+        assert crawl.crawl_all_feeds(["https://good.example/rss"], blocking=False) is None
+    assert crawl.crawl_all_feeds(["https://good.example/rss"], blocking=False) is not None
+
+
+def test_only_one_scheduler_is_leader(tmp_path):
+    lock_file = str(tmp_path / "crawl_scheduler.lock")
+    first = CrawlScheduler(str(tmp_path / "schedule.json"), lock_file)
+    second = CrawlScheduler(str(tmp_path / "schedule.json"), lock_file)
+
+    assert first.elect()
+    assert not second.elect()
+    first._leader.release()
+    assert second.elect()
+
+
+def test_queued_feeds_get_their_own_timeout(tmp_path, monkeypatch):
+    _isolate(tmp_path, monkeypatch)
+    pool = ThreadPoolExecutor(max_workers=4)
+
+    class Engine:
+        def get(self, url, headers=None):
+            rss = f"<rss><channel><item><link>{url}/a</link></item></channel></rss>"
+            return SimpleNamespace(status_code=200, content=rss.encode(), headers={}, raise_for_status=lambda: None)
+
+        def submit(self, fn, *args):
+            return pool.submit(fn, *args)
+
+    def parse_entry(entry, source_url):
+        time.sleep(0.3)
+        return _article(crawl.entry_url(entry), 0)
+
+    monkeypatch.setattr(crawl, "get_engine", lambda: Engine())
+    monkeypatch.setattr(crawl, "parse_entry", parse_entry)
+    monkeypatch.setattr(crawl, "FEED_WORKERS", 1)       # feeds wait in line for the single worker
+    monkeypatch.setattr(crawl, "SOURCE_TIMEOUT", 0.5)   # enough for one feed, not for the wait
+
+    run_log = crawl.crawl_all_feeds([f"https://feed{i}.example/rss" for i in range(3)])
+
+    assert [r.get("timed_out", 0) for r in run_log["results"]] == [0, 0, 0]
+    assert run_log["total_new"] == 3
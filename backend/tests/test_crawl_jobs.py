@@ -0,0 +1,48 @@
+import threading
+
+from backend.services import crawl_jobs
+from backend.services.crawl_jobs import JobRegistry
+
+
+def test_job_status_is_visible_from_another_worker(tmp_path):
+    path = str(tmp_path / "crawl_jobs.json")
+    worker_a, worker_b = JobRegistry(path), JobRegistry(path)   # one registry per uvicorn process
+    release = threading.Event()
+
+    def crawl_fn(sources, progress):
+        progress("start")
+        progress("source", {"source": sources[0], "status": "ok", "added": 2})
+        release.wait(5)
+        return {"total_new": 2}
+
+    job, created = worker_a.start(crawl_fn, ["https://a.example/rss", "https://b.example/rss"])
+    assert created
+
+    # worker B sees the running job and refuses to start a second crawl
+    other, created = worker_b.start(crawl_fn, ["https://a.example/rss"])
+    assert not created and other["job_id"] == job["job_id"]
+    for _ in range(100):
+        seen = worker_b.get(job["job_id"])
+        if seen["feeds_done"] == 1:
+            break
+        release.wait(0.01)
+    assert seen["status"] == "running" and seen["articles_added"] == 2
+
+    release.set()
+    for _ in range(500):
+        if worker_b.get(job["job_id"])["status"] == "done":
+            break
+        threading.Event().wait(0.01)
+    assert worker_b.get(job["job_id"])["result"] == {"total_new": 2}
+    assert [j["job_id"] for j in worker_b.recent()] == [job["job_id"]]
+
+
+def test_job_of_a_dead_worker_does_not_block_new_runs(tmp_path, monkeypatch):
+    registry = JobRegistry(str(tmp_path / "crawl_jobs.json"))
+    registry._publish({"job_id": "lost", "status": "running", "created": "", "started_at": 1.0,
+                       "finished_at": None, "updated_at": 1.0, "feeds_total": 1, "feeds_done": 0,
+                       "articles_added": 0, "feeds": {}, "result": None, "error": None})
+    assert registry.get("lost")["status"] == "failed"
+
+    monkeypatch.setattr(crawl_jobs, "STALE_SECONDS", 10 ** 12)
+    assert registry.get("lost")["status"] == "running"
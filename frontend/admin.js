@@ -614,6 +614,7 @@ document.addEventListener("DOMContentLoaded", () => {
               case "success": color = "green"; label = "Thành công"; break;
               case "warning": color = "yellow"; label = "Cảnh báo"; break;
               case "empty": color = "gray"; label = "Không có dữ liệu"; break;
+              case "not_modified": color = "gray"; label = "Không thay đổi"; break;
               default: color = "red"; label = "Thất bại";
           }
 
@@ -813,6 +814,22 @@ function extractDomain(str) {
 
   loadSources();
 
+    // --- Poll a crawl job until it finishes, showing per-feed progress on the button ---
+    async function waitForCrawlJob(jobId) {
+        while (true) {
+            const res = await fetch(`${API_BASE}/crawler/jobs/${jobId}`);
+            // pruned from the job list (or an older server): the crawl itself may still be fine
+            if (res.status === 404) return { status: "unknown" };
+            const job = await res.json();
+            if (!res.ok) throw new Error(job.detail || "Không tìm thấy job");
+            if (job.status === "done" || job.status === "failed") return job;
+
+            runBtn.lastChild.textContent =
+                ` Đang chạy... ${job.feeds_done}/${job.feeds_total} nguồn, ${job.articles_added} bài mới (${Math.round(job.elapsed)}s)`;
+            await new Promise(r => setTimeout(r, 2000));
+        }
+    }
+
     // --- Run crawler manually ---
     runBtn.addEventListener("click", async () => {
         runBtn.disabled = true;
@@ -826,13 +843,24 @@ function extractDomain(str) {
             const res = await fetch(`${API_BASE}/crawler/run`, { method: "POST" });
             const data = await res.json();
 
-            if (!res.ok || data.error) {
+            // A run already in progress is reported with its job_id: follow that one instead
+            if (!data.job_id) {
                 alert(`❌ Lỗi khi crawl: ${data.error || "Không xác định"}`);
                 return;
             }
 
-            const message = data.message ?? `Crawl completed! (${data.log?.total_new ?? 0} bài viết mới)`;
-            alert(`✅ ${message}`);
+            const job = await waitForCrawlJob(data.job_id);
+            if (job.status === "unknown") {
+                alert("⚠️ Không theo dõi được tiến độ crawl; xem nhật ký hệ thống để biết kết quả.");
+                await loadLogs();
+                return;
+            }
+            if (job.status === "failed") {
+                alert(`❌ Lỗi khi crawl: ${job.error || "Không xác định"}`);
+                return;
+            }
+
+            alert(`✅ Crawl completed successfully! ${job.articles_added} bài viết mới được thêm.`);
 
             await loadLogs();
         } catch (err) {